@@ -0,0 +1,311 @@
+"""Benchmarks for Kalium's hot paths.
+
+Run from the repository root:
+
+    python benchmarks/bench.py -o results.json
+    python benchmarks/bench.py --filter translate --compare results.json
+
+Widget benchmarks run under Qt's offscreen platform and are skipped when
+PySide6 is not installed. Results are written as JSON with the commit they
+were measured on, --compare prints the ratio against an earlier run.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import string
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from engine import translate, MacroReplacer
+from utils.json_manager import JSONManager
+
+BENCHMARKS = []
+
+def benchmark(group: str, params: list, number: int = 1):
+    """Register setup(param) -> callable, timed `number` calls per repeat."""
+    def register(setup):
+        for param in params:
+            BENCHMARKS.append((f"{group}[{param}]", group, setup, param, number))
+        return setup
+    return register
+
+# Removed after each benchmark by run()
+_temp_dirs: list[tempfile.TemporaryDirectory] = []
+
+def temp_path(name: str) -> str:
+    directory = tempfile.TemporaryDirectory(prefix="kalium-bench-", ignore_cleanup_errors=True)
+    _temp_dirs.append(directory)
+    return os.path.join(directory.name, name)
+
+def qt_app():
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+# Expressions
+
+_TERMS = [
+    r"\frac{a_{%d}}{b^{2}}",
+    r"\sqrt{x^{2}+%d}",
+    r"4.19\,\text{kJ}\cdot %d\,\text{kg}",
+    r"\sin^{2}\alpha+\cos %d\beta",
+    r"\left(\mu_{0}+\varepsilon_{%d}\right)",
+    r"e^{i\pi %d}",
+]
+
+def expression(size: int, seed: int = 0) -> str:
+    """Deterministic LaTeX expression of about `size` characters"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        term = rng.choice(_TERMS) % rng.randint(0, 99)
+        parts.append(term)
+        length += len(term) + 1
+    return "+".join(parts)
+
+SIZES = {"small": 20, "medium": 200, "large": 2_000, "huge": 20_000}
+MODES = {"default": {}, "cas": {"TI_on": True}, "speedcrunch": {"SC_on": True}}
+
+@benchmark("translate", [f"{size}-{mode}" for size in SIZES for mode in MODES])
+def bench_translate(param):
+    size, mode = param.split("-")
+    latex = expression(SIZES[size])
+    flags = MODES[mode]
+    return lambda: translate(latex, **flags)
+
+# Macros
+
+def macros(count: int | str) -> list[tuple[str, str]]:
+    """The shipped macros, padded with random ones of mixed first characters"""
+    with open(os.path.join(ROOT, "data", "macros.json"), 'r', encoding='utf-8') as file:
+        pairs = [(row[0], row[1]) for row in json.load(file)]
+    if count == "shipped":
+        return pairs
+    rng = random.Random(count)
+    chars = string.ascii_letters + string.digits + "\\_^()*+-/.,·°"
+    while len(pairs) < count:
+        pairs.append(("".join(rng.choices(chars, k=rng.randint(2, 8))), "·"))
+    return pairs[:count]
+
+def macro_text(pairs: list[tuple[str, str]], size: int = 5_000) -> str:
+    base = translate(expression(size), TI_on=True)
+    sources = [source for source, _ in pairs[:10]]
+    return " ".join([base] + sources)
+
+@benchmark("macros-single-pass", ["shipped", 10, 100, 1_000], number=10)
+def bench_macros(count):
+    pairs = macros(count)
+    replacer = MacroReplacer(pairs)
+    text = macro_text(pairs)
+    return lambda: replacer.apply(text)
+
+@benchmark("macros-sequential", ["shipped", 10, 100, 1_000], number=10)
+def bench_macros_sequential(count):
+    pairs = macros(count)
+    replacer = MacroReplacer(pairs, sequential=True)
+    text = macro_text(pairs)
+    return lambda: replacer.apply(text)
+
+@benchmark("macros-compile", ["shipped", 10, 100, 1_000])
+def bench_macros_compile(count):
+    pairs = macros(count)
+    return lambda: MacroReplacer(pairs)
+
+# History
+
+def history(count: int) -> list[list[str]]:
+    return [[expression(40, seed=i), translate(expression(40, seed=i))] for i in range(count)]
+
+@benchmark("history-append-list", [100, 1_000, 10_000, 100_000])
+def bench_history_append_list(count):
+    qt_app()
+    from widgets import HistoryScroll
+    data = history(count)
+
+    def run():
+        scroll = HistoryScroll()
+        scroll.append_list(data)
+        scroll.deleteLater()
+    return run
+
+@benchmark("history-search", [10_000, 100_000], number=20)
+def bench_history_search(count):
+    from utils.history_store import HistoryStore
+    store = HistoryStore(temp_path("history.db"))
+    store.extend([(expression(40, seed=i), f"{i} " + translate(expression(40, seed=i))) for i in range(count)])
+    queries = ["alpha", "mu_0", "1234", "sqrt(x^2"]
+    return lambda: [store.search(query, limit=200) for query in queries]
+
+# JSONManager
+
+@benchmark("json-load", [100, 1_000, 10_000])
+def bench_json_load(count):
+    path = temp_path("history.json")
+    manager = JSONManager()
+    manager.filepath = path
+    manager.set_data(history(count))
+    # Written now, not by the write-behind timer while loads are timed
+    manager.flush()
+    return lambda: JSONManager(path)
+
+@benchmark("json-save", [100, 1_000, 10_000])
+def bench_json_save(count):
+    manager = JSONManager()
+    manager.filepath = temp_path("history.json")
+    manager.set_data(history(count))
+    # No write-behind save racing the timed ones
+    manager.flush()
+    return manager.save_data
+
+# JSON editor
+
+def json_text(size: int) -> str:
+    """history.json as the editor shows it, about `size` bytes"""
+    entry = json.dumps(history(1_000), indent="\t")[1:-1].strip("\n")
+    return "[\n" + ",\n".join([entry] * max(1, size // len(entry))) + "\n]"
+
+@benchmark("editor-highlight-10MB", ["all", "visible"])
+def bench_editor_highlight(blocks):
+    qt_app()
+    from PySide6.QtGui import QTextDocument
+    from utils.json_editor import SyntaxHighlighter
+    text = json_text(10_000_000)
+    document = QTextDocument()
+    highlighter = SyntaxHighlighter(document)
+
+    def run():
+        # First screen only, as JSONEditor.load_json does
+        highlighter.visible_range = None if blocks == "all" else (0, 100)
+        document.setPlainText(text)
+    return run
+
+# Styles
+
+@benchmark("load-style", ["dark", "light", "unchanged"], number=5)
+def bench_load_style(mode):
+    qt_app()
+    from ui.ui import WindowUI
+    ui = WindowUI()
+    if mode == "unchanged":
+        # Same stylesheet as applied, setStyleSheet is skipped
+        ui.load_style("dark")
+        return lambda: ui.load_style("dark")
+
+    def load():
+        # Forget the applied stylesheet, otherwise every call after the first is skipped
+        ui.applied_stylesheet = None
+        ui.load_style(mode)
+    return load
+
+@benchmark("style-render", ["cold", "cached"], number=20)
+def bench_style_render(cache):
+    from ui.style_template import StyleTemplate
+    from utils.resource_helpers import load_and_concatenate
+    template = StyleTemplate(load_and_concatenate(os.path.join(ROOT, "src", "ui", "styles")))
+    palette = JSONManager(os.path.join(ROOT, "config", "theme.json")).get_section("dark")
+    if cache == "cached":
+        return lambda: template.render(palette)
+    return lambda: (template._cache.clear(), template.render(palette))
+
+# Runner
+
+def measure(func, number: int, repeat: int) -> list[float]:
+    func()  # warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return times
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(filter_: str | None, repeat: int) -> dict:
+    results = {}
+    for name, group, setup, param, number in BENCHMARKS:
+        if filter_ and filter_ not in name:
+            continue
+        try:
+            func = setup(param)
+            times = measure(func, number, repeat)
+        except ImportError as e:
+            results[name] = {"group": group, "skipped": str(e)}
+            print(f"{name:40} skipped ({e})")
+            continue
+        finally:
+            func = None
+            while _temp_dirs:
+                _temp_dirs.pop().cleanup()
+
+        results[name] = {
+            "group": group,
+            "param": param,
+            "number": number,
+            "repeat": repeat,
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.fmean(times),
+        }
+        print(f"{name:40} {results[name]['median'] * 1e3:10.3f} ms")
+    return results
+
+def compare(results: dict, baseline_path: str) -> None:
+    with open(baseline_path, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)["results"]
+    print(f"\nCompared to {baseline_path} (median, new / old)")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if "median" not in result or not old or "median" not in old:
+            continue
+        print(f"{name:40} {result['median'] / old['median']:8.2f}x")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Kalium benchmarks")
+    parser.add_argument("-o", "--output", help="Write results as JSON to this file")
+    parser.add_argument("-k", "--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--compare", help="Earlier JSON results to compare against")
+    parser.add_argument("--list", action="store_true", help="List benchmark names")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, *_ in BENCHMARKS:
+            print(name)
+        return 0
+
+    # Resource paths are relative to the working directory
+    os.chdir(ROOT)
+    results = run(args.filter, args.repeat)
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent='\t')
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Startup time regression check.
+
+Starts Kalium under Qt's offscreen platform with the startup trace on,
+quits after the first paint and fails when that took longer than the
+budget. Every run is a --new-instance with config/ and data/ copied to a
+temporary KALIUM_HOME, so a running Kalium and its files are left alone.
+Run from anywhere:
+
+    python benchmarks/startup.py --budget 1500
+    python benchmarks/startup.py --runs 5 --report
+
+The median of --runs cold starts is compared against --budget (ms), which
+defaults to KALIUM_STARTUP_BUDGET_MS or 2000. For a per-module breakdown of
+the imports, run src/main.py with python -X importtime.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def copy_home(home: str) -> None:
+    """Copy config/ and data/ without the files Kalium writes while running"""
+    shutil.copytree(os.path.join(ROOT, "config"), os.path.join(home, "config"))
+    shutil.copytree(
+        os.path.join(ROOT, "data"), os.path.join(home, "data"),
+        ignore=shutil.ignore_patterns("*.db-wal", "*.db-shm", "stalls-*", "timings-*"),
+    )
+    return
+
+def start_once(timeout: float, home: str) -> dict:
+    env = dict(
+        os.environ,
+        QT_QPA_PLATFORM="offscreen",
+        KALIUM_STARTUP_TRACE="json",
+        KALIUM_STARTUP_EXIT="1",
+        KALIUM_HOME=home,
+    )
+    result = subprocess.run(
+        [sys.executable, os.path.join("src", "main.py"), "--new-instance"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=timeout,
+    )
+    for line in reversed(result.stderr.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"No startup report, exit code {result.returncode}:\n{result.stderr}")
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Kalium startup budget check")
+    parser.add_argument("--budget", type=float, default=float(os.environ.get("KALIUM_STARTUP_BUDGET_MS", 2000)),
+                        help="Maximum median time to first paint in ms")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds before a start counts as hung")
+    parser.add_argument("--report", action="store_true", help="Print the phases of the median run")
+    args = parser.parse_args(argv)
+
+    try:
+        import PySide6  # noqa: F401
+    except ImportError:
+        print("PySide6 is not installed, skipping the startup check")
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="kalium-startup-", ignore_cleanup_errors=True) as home:
+        copy_home(home)
+        # Not timed, migrates history.json to history.db like a first start
+        start_once(args.timeout, home)
+        reports = [start_once(args.timeout, home) for _ in range(args.runs)]
+    reports.sort(key=lambda report: report["first_paint"])
+    median = reports[len(reports) // 2]
+    first_paint = statistics.median(report["first_paint"] for report in reports) * 1e3
+
+    if args.report:
+        for item in median["phases"]:
+            print(f"{item['name']:50} {item['duration'] * 1e3:9.1f} ms")
+
+    print(f"first paint {first_paint:.1f} ms (median of {args.runs}), budget {args.budget:.0f} ms")
+    if first_paint > args.budget:
+        print("Over budget", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""Headless batch translation and commands for the running window.
+
+    Kalium translate [files ...] [--mode cas] [--macros data/macros.json] [-j 8]
+    Kalium send translate "\frac{a}{b}" [--mode cas]
+
+translate reads one LaTeX expression per line, or JSONL records with
+--format jsonl, from the given files or stdin and writes the translations
+in input order. Records are spread over a process pool and results are
+streamed as soon as the next record in order is done.
+
+send hands raise, quick or translate to the running Kalium and prints the
+result, see utils/single_instance.py.
+"""
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+from engine import MacroReplacer, TranslationCache
+from utils.json_manager import JSONManager
+
+MODES = {
+    "default":     {},
+    "cas":         {"TI_on": True},
+    "speedcrunch": {"SC_on": True},
+}
+
+# Set in each worker process by _init_worker
+_macros: MacroReplacer | None = None
+_flags: dict = {}
+_cache: TranslationCache | None = None
+
+def _init_worker(macros: list[tuple[str, str]], sequential: bool, flags: dict) -> None:
+    global _macros, _flags, _cache
+    _macros = MacroReplacer(macros, sequential)
+    _flags = flags
+    _cache = TranslationCache(maxsize=4096)
+
+def _translate_line(line: str) -> str:
+    # One output line per record
+    return _cache.translate(line, _macros, _flags).replace("\n", " ")
+
+def _translate_record(line: str) -> str:
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        return json.dumps({"error": f"JSONDecodeError: {e.msg}", "line": line}, ensure_ascii=False)
+
+    if isinstance(record, str):
+        record = {"latex": record}
+    if not isinstance(record, dict) or not isinstance(record.get("latex"), str):
+        return json.dumps({"error": "Expected a string or an object with a \"latex\" string", "line": line}, ensure_ascii=False)
+
+    record["translation"] = _cache.translate(record["latex"], _macros, _flags)
+    return json.dumps(record, ensure_ascii=False)
+
+def _read_lines(paths: list[str], skip_blank: bool):
+    for path in paths or ["-"]:
+        file = sys.stdin if path == "-" else open(path, 'r', encoding='utf-8')
+        try:
+            for line in file:
+                line = line.rstrip("\r\n")
+                if skip_blank and not line.strip():
+                    continue
+                yield line
+        finally:
+            if file is not sys.stdin:
+                file.close()
+
+def _load_macros(path: str | None) -> list[tuple[str, str]]:
+    if path is None:
+        return []
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Macro file not found: {path}")
+    data = JSONManager(path).get_data()
+    return [(row[0], row[1]) for row in data if row[2]]
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="Kalium", description="Kalium command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    translate = commands.add_parser("translate", help="Translate LaTeX expressions in bulk")
+    translate.add_argument("files", nargs="*", help="Input files, stdin if omitted or -")
+    translate.add_argument("-o", "--output", default="-", help="Output file, stdout by default")
+    translate.add_argument("-f", "--format", choices=("lines", "jsonl"), default="lines",
+                           help="lines: one expression per line. jsonl: one JSON string or "
+                                "object with a \"latex\" field per line, \"translation\" is added to it")
+    translate.add_argument("-m", "--mode", choices=MODES.keys(), default="default", help="Translation mode")
+    translate.add_argument("--constants", action="store_true", help="Use TI-Nspire constants")
+    translate.add_argument("--g", action="store_true", help="Translate g to _g")
+    translate.add_argument("--e", action="store_true", help="Translate e to @e")
+    translate.add_argument("--i", action="store_true", help="Translate i to @i")
+    translate.add_argument("--macros", help="Macro file in the format of data/macros.json, enabled rows are applied")
+    translate.add_argument("--sequential-macros", action="store_true", help="Apply macros one after another")
+    translate.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    translate.add_argument("--chunksize", type=int, default=256, help="Records sent to a worker at a time")
+
+    send = commands.add_parser("send", help="Send a command to the running Kalium window")
+    send.add_argument("action", choices=("raise", "quick", "translate"),
+                      help="raise: show the window. quick: quick translate the clipboard. "
+                           "translate: translate the text with the window's settings")
+    send.add_argument("text", nargs="?", help="Text to translate, stdin if omitted")
+    send.add_argument("-m", "--mode", choices=MODES.keys(), help="Translation mode, the window's by default")
+    return parser
+
+def run_send(args) -> int:
+    # Imported here so Kalium translate works without PySide6
+    from utils.single_instance import send_command
+
+    request = {}
+    if args.action == "translate":
+        request["text"] = args.text if args.text is not None else sys.stdin.read().rstrip("\n")
+        if args.mode:
+            request["mode"] = args.mode
+
+    response = send_command(args.action, **request)
+    if response is None:
+        print("Kalium: Kalium is not running", file=sys.stderr)
+        return 1
+    if not response.get("ok"):
+        print(f"Kalium: {response.get('error')}", file=sys.stderr)
+        return 1
+    if response.get("result") is not None:
+        print(response["result"])
+    return 0
+
+def run_translate(args) -> int:
+    try:
+        macros = _load_macros(args.macros)
+    except (OSError, ValueError, IndexError, TypeError) as e:
+        print(f"Kalium: {e}", file=sys.stderr)
+        return 2
+
+    for path in args.files:
+        if path != "-" and not os.path.isfile(path):
+            print(f"Kalium: Input file not found: {path}", file=sys.stderr)
+            return 2
+
+    flags = dict(MODES[args.mode], constants_on=args.constants, g_on=args.g, i_on=args.i, e_on=args.e)
+    jsonl = args.format == "jsonl"
+    func = _translate_record if jsonl else _translate_line
+    lines = _read_lines(args.files, skip_blank=jsonl)
+    init_args = (macros, args.sequential_macros, flags)
+
+    out = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+    try:
+        if args.jobs <= 1:
+            _init_worker(*init_args)
+            for result in map(func, lines):
+                out.write(result + "\n")
+        else:
+            with Pool(args.jobs, initializer=_init_worker, initargs=init_args) as pool:
+                # imap keeps input order and yields results as they complete
+                for result in pool.imap(func, lines, chunksize=max(1, args.chunksize)):
+                    out.write(result + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+    return 0
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "translate":
+        return run_translate(args)
+    if args.command == "send":
+        return run_send(args)
+    return 2
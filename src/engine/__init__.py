@@ -0,0 +1,5 @@
+from .translator import translate, translate_with_macros, get_emitter
+from .tokenizer import tokenize
+from .parser import parse
+from .macros import MacroReplacer
+from .cache import TranslationCache
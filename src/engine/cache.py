@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+from engine.macros import MacroReplacer
+from engine.translator import translate, translate_with_macros
+
+FLAGS = ("TI_on", "SC_on", "constants_on", "g_on", "i_on", "e_on")
+
+class TranslationCache:
+    """Bounded LRU cache around the translate-plus-macros pipeline.
+
+    Entries are keyed by the input, the six mode and legacy flags and the
+    version of the compiled macros, so rebuilding the macros never serves a
+    stale translation. hits and misses count get() calls and are meant for
+    sizing maxsize. Safe to use from the translation worker thread.
+    """
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(latex: str, macros: MacroReplacer, flags: dict) -> tuple:
+        return (latex, macros.version, *(bool(flags.get(flag, False)) for flag in FLAGS))
+
+    def get(self, latex: str, macros: MacroReplacer, flags: dict) -> str | None:
+        key = self.key(latex, macros, flags)
+        with self._lock:
+            translation = self._entries.get(key)
+            if translation is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        return translation
+
+    def compute(self, latex: str, macros: MacroReplacer, flags: dict, timings=None) -> str:
+        """Translate without looking up the cache and store the result.
+
+        timings is an optional utils.stage_timer.StageTimings that the
+        translate and macros stages are added to.
+        """
+        if timings is None:
+            translation = translate_with_macros(latex, macros, **flags)
+        else:
+            start = time.perf_counter()
+            translation = translate(latex, **flags)
+            middle = time.perf_counter()
+            translation = macros.apply(translation)
+            timings.add("translate", middle - start)
+            timings.add("macros", time.perf_counter() - middle)
+        key = self.key(latex, macros, flags)
+        with self._lock:
+            self._entries[key] = translation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return translation
+
+    def translate(self, latex: str, macros: MacroReplacer, flags: dict, timings=None) -> str:
+        translation = self.get(latex, macros, flags)
+        if translation is None:
+            translation = self.compute(latex, macros, flags, timings)
+        elif timings is not None:
+            timings.cache_hits += 1
+        return translation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
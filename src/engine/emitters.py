@@ -0,0 +1,327 @@
+import re
+
+from engine.nodes import (
+    Number, Symbol, Operator, Command, Text, Group, Fraction,
+    Root, Function, Scripted, Newline, OPERANDS
+)
+from engine import symbols
+
+_UNIT_TEXT_RE = re.compile(r"(?P<unit>°C|°|[^\W\d_]+)|(?P<space>\s+)|(?P<other>.)", re.DOTALL)
+
+def split_unit(word: str) -> tuple[str, str] | None:
+    """Split a unit symbol such as `kJ` into its prefix and base unit."""
+    if word in symbols.UNITS:
+        return ("", word)
+    for size in (2, 1):
+        prefix, base = word[:size], word[size:]
+        if prefix in symbols.UNIT_PREFIXES and base in symbols.UNITS:
+            return (prefix, base)
+    return None
+
+# Symbols written after their operand, e.g. 90° and f'
+_POSTFIX = {"°", "'"}
+
+class Emitter:
+    """Plain symbolic output. Calculator targets override the hooks below."""
+    operator_names: dict[str, str] = {}
+    symbol_names: dict[str, str] = {}
+    function_names: dict[str, str] = {}
+    # Write * between juxtaposed operands, calculators read `pir` as one name
+    explicit_multiplication = False
+
+    def __init__(self) -> None:
+        self._handlers = {
+            Number:   self._number,
+            Symbol:   self._symbol,
+            Operator: self._operator,
+            Command:  self._command,
+            Text:     self._text,
+            Group:    self._group,
+            Fraction: self._fraction,
+            Root:     self._root,
+            Function: self._function,
+            Scripted: self._scripted,
+            Newline:  self._newline,
+        }
+
+    def emit(self, nodes: list) -> str:
+        out: list[str] = []
+        self._sequence(nodes, out)
+        return "".join(out)
+
+    def _sequence(self, nodes: list, out: list[str]) -> None:
+        prev = None
+        for node in nodes:
+            if prev is not None and self._needs_multiplication(prev, node):
+                out.append("*")
+            self._handlers[type(node)](node, out)
+            prev = node
+
+    def _needs_multiplication(self, prev, node) -> bool:
+        if not isinstance(prev, OPERANDS):
+            return False
+        if isinstance(node, Fraction):
+            return True
+        if not self.explicit_multiplication or not isinstance(node, OPERANDS):
+            return False
+        # Text is a unit or words and commands are left for the macros
+        if isinstance(prev, (Text, Command)) or isinstance(node, (Text, Command)):
+            return False
+        # Digit groups such as 1\,000
+        if isinstance(prev, Number) and isinstance(node, Number):
+            return False
+        if isinstance(node, Symbol) and node.name in _POSTFIX:
+            return False
+        # Scripts without a base, e.g. ^{14}C
+        return not (isinstance(prev, Scripted) and prev.base == Group())
+
+    def _parenthesized(self, group: Group, out: list[str]) -> None:
+        out.append("(")
+        self._sequence(group.children, out)
+        out.append(")")
+
+    def _number(self, node: Number, out: list[str]) -> None:
+        out.append(node.text)
+
+    def _symbol(self, node: Symbol, out: list[str]) -> None:
+        out.append(self.symbol_names.get(node.name, node.name))
+
+    def _operator(self, node: Operator, out: list[str]) -> None:
+        out.append(self.operator_names.get(node.text, node.text))
+
+    def _command(self, node: Command, out: list[str]) -> None:
+        out.append(node.text)
+
+    def _text(self, node: Text, out: list[str]) -> None:
+        out.append(node.text.strip())
+
+    def _group(self, node: Group, out: list[str]) -> None:
+        children = node.children
+        if len(children) == 1 and not isinstance(children[0], Scripted):
+            self._handlers[type(children[0])](children[0], out)
+        elif children:
+            self._parenthesized(node, out)
+
+    def _fraction(self, node: Fraction, out: list[str]) -> None:
+        out.append("(")
+        self._group(node.numerator, out)
+        out.append("/")
+        self._group(node.denominator, out)
+        out.append(")")
+
+    def _root(self, node: Root, out: list[str]) -> None:
+        if node.index is None:
+            out.append("√")
+            self._parenthesized(node.radicand, out)
+        else:
+            out.append("root(")
+            self._sequence(node.radicand.children, out)
+            out.append(",")
+            self._sequence(node.index.children, out)
+            out.append(")")
+
+    def _function(self, node: Function, out: list[str]) -> None:
+        out.append(self.function_names.get(node.name, node.name))
+        if node.argument is not None:
+            self._parenthesized(node.argument, out)
+
+    def _scripted(self, node: Scripted, out: list[str]) -> None:
+        if isinstance(node.base, Function) and node.sub is not None:
+            self._subscripted_function(node.base, node.sub, out)
+        else:
+            self._handlers[type(node.base)](node.base, out)
+            if node.sub is not None:
+                self._subscript(node.sub, out)
+        if node.sup is not None:
+            self._superscript(node.sup, out)
+
+    def _subscripted_function(self, node: Function, sub: Group, out: list[str]) -> None:
+        """The subscript belongs to the name, \\log_2 x is log₂(x)"""
+        out.append(self.function_names.get(node.name, node.name))
+        self._subscript(sub, out)
+        if node.argument is not None:
+            self._parenthesized(node.argument, out)
+
+    def _subscript(self, sub: Group, out: list[str]) -> None:
+        name = self._identifier(sub)
+        if name is not None and name.isdigit():
+            out.append(name.translate(symbols.SUBSCRIPT_DIGITS))
+        elif sub.children:
+            out.append("_")
+            self._group(sub, out)
+
+    def _superscript(self, sup: Group, out: list[str]) -> None:
+        children = sup.children
+        if len(children) == 1 and children[0] in (Symbol("°"), Symbol("'")):
+            # ^\circ and ^\prime
+            out.append(children[0].name)
+        elif children:
+            out.append("^")
+            self._group(sup, out)
+
+    def _newline(self, node: Newline, out: list[str]) -> None:
+        out.append("\n")
+
+    def _identifier(self, group: Group) -> str | None:
+        """Concatenated text of a group made of letters and numbers only."""
+        parts = []
+        for child in group.children:
+            if isinstance(child, Symbol):
+                parts.append(child.name)
+            elif isinstance(child, Number):
+                parts.append(child.text)
+            else:
+                return None
+        return "".join(parts)
+
+    def _units(self, text: str, unit) -> tuple[str, int] | None:
+        """Translate text made only of unit symbols with `unit(prefix, base)`.
+
+        Returns the translation and the number of units in it, or None if
+        the text contains anything that is not a known unit.
+        """
+        out = []
+        count = 0
+        prev_unit = False
+        for match in _UNIT_TEXT_RE.finditer(text.replace("\\cdot", "·")):
+            kind = match.lastgroup
+            part = match.group()
+            if kind == "space":
+                continue
+            if kind == "other":
+                out.append("*" if part in "·⋅" else part)
+                prev_unit = False
+                continue
+
+            split = split_unit(part)
+            translation = unit(*split) if split is not None else None
+            if translation is None:
+                return None
+            if prev_unit:
+                out.append("*")
+            out.append(translation)
+            prev_unit = True
+            count += 1
+
+        if count == 0:
+            return None
+        return ("".join(out), count)
+
+class NspireEmitter(Emitter):
+    """TI-nspire CX CAS output with units and optional built-in constants."""
+    explicit_multiplication = True
+
+    def __init__(self, constants_on=False, g_on=False, i_on=False, e_on=False) -> None:
+        super().__init__()
+        self.constants_on = constants_on
+        self.symbol_names = {}
+        if g_on: self.symbol_names["g"] = "_g"
+        if i_on: self.symbol_names["i"] = "@i"
+        if e_on: self.symbol_names["e"] = "@e"
+
+    def _symbol(self, node: Symbol, out: list[str]) -> None:
+        if self.constants_on and (constant := symbols.NSPIRE_CONSTANTS.get((node.name, ""))):
+            out.append(constant)
+        else:
+            super()._symbol(node, out)
+
+    def _scripted(self, node: Scripted, out: list[str]) -> None:
+        if self.constants_on and node.sub is not None:
+            base = node.base
+            if isinstance(base, Group) and len(base.children) == 1:
+                base = base.children[0]
+            key = (base.name if isinstance(base, Symbol) else None, self._identifier(node.sub))
+            if constant := symbols.NSPIRE_CONSTANTS.get(key):
+                out.append(constant)
+                if node.sup is not None:
+                    self._superscript(node.sup, out)
+                return
+        super()._scripted(node, out)
+
+    def _subscripted_function(self, node: Function, sub: Group, out: list[str]) -> None:
+        # log(x,b)
+        if node.name == "log" and node.argument is not None and sub.children:
+            out.append("log(")
+            self._sequence(node.argument.children, out)
+            out.append(",")
+            self._sequence(sub.children, out)
+            out.append(")")
+        else:
+            super()._subscripted_function(node, sub, out)
+
+    def _subscript(self, sub: Group, out: list[str]) -> None:
+        # Nspire variable names can't have subscripts, join them to the name
+        name = self._identifier(sub)
+        if name:
+            out.append(name)
+        elif sub.children:
+            out.append("_")
+            self._group(sub, out)
+
+    def _text(self, node: Text, out: list[str]) -> None:
+        units = self._units(node.text, self._unit)
+        if units is None:
+            super()._text(node, out)
+        else:
+            out.append(units[0])
+
+    def _unit(self, prefix: str, base: str) -> str:
+        return "_" + prefix + symbols.UNITS[base][0]
+
+class SpeedCrunchEmitter(Emitter):
+    """SpeedCrunch output with units spelled out."""
+    operator_names = {"≤": "<=", "≥": ">=", "≠": "!="}
+    symbol_names = {"π": "pi"}
+    function_names = {"log": "lg"}
+    explicit_multiplication = True
+
+    def _needs_multiplication(self, prev, node) -> bool:
+        if isinstance(node, Text) and isinstance(prev, OPERANDS):
+            return self._units(node.text, self._unit) is not None
+        return super()._needs_multiplication(prev, node)
+
+    def _subscripted_function(self, node: Function, sub: Group, out: list[str]) -> None:
+        # log(b; x)
+        if node.name == "log" and node.argument is not None and sub.children:
+            out.append("log(")
+            self._sequence(sub.children, out)
+            out.append("; ")
+            self._sequence(node.argument.children, out)
+            out.append(")")
+        else:
+            super()._subscripted_function(node, sub, out)
+
+    def _root(self, node: Root, out: list[str]) -> None:
+        if node.index is None:
+            out.append("sqrt")
+            self._parenthesized(node.radicand, out)
+        else:
+            self._group(node.radicand, out)
+            out.append("^(1/")
+            self._group(node.index, out)
+            out.append(")")
+
+    def _subscript(self, sub: Group, out: list[str]) -> None:
+        name = self._identifier(sub)
+        if name:
+            out.append("_" + name)
+        elif sub.children:
+            out.append("_")
+            self._group(sub, out)
+
+    def _text(self, node: Text, out: list[str]) -> None:
+        units = self._units(node.text, self._unit)
+        if units is None:
+            super()._text(node, out)
+        elif units[1] > 1:
+            out.append("(" + units[0] + ")")
+        else:
+            out.append(units[0])
+
+    def _unit(self, prefix: str, base: str) -> str | None:
+        name = symbols.UNITS[base][1]
+        if name is None:
+            return None
+        if prefix:
+            return f"({symbols.UNIT_PREFIXES[prefix]} {name})"
+        return name
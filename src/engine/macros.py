@@ -0,0 +1,81 @@
+import re
+from itertools import count
+
+_versions = count()
+
+def _trie_pattern(node: dict) -> str:
+    """Regex matching the longest path of a character trie, "" marks a macro end"""
+    leaves = []
+    branches = []
+    for char, child in sorted(node.items()):
+        if char == "":
+            continue
+        if list(child) == [""]:
+            leaves.append(re.escape(char))
+        else:
+            branches.append(re.escape(char) + _trie_pattern(child))
+    if leaves:
+        branches.append(leaves[0] if len(leaves) == 1 else f"[{''.join(leaves)}]")
+
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if "" in node:
+        # Greedy, a longer macro through this node is tried first
+        return f"(?:{pattern})?"
+    return pattern
+
+class MacroReplacer:
+    """Applies every enabled macro to a translation in one scan.
+
+    Macros are compiled once into a regex with common prefixes factored out,
+    \\a|\\b becomes \\(?:a|b), so the regex engine checks one character
+    per step instead of every macro at every position. Shorter matches are
+    optional tails, so at each position the longest macro starting there
+    is replaced (leftmost-longest) and the scan continues after it. The
+    output of one macro is never matched again.
+
+    With sequential=True macros are instead applied one after another in
+    table order with str.replace, where a macro may rewrite the output of
+    an earlier one. This is how Kalium applied macros before, enable it with
+    "sequential_macros" in the settings section of config/settings.json.
+    """
+    def __init__(self, macros: list[tuple[str, str]] = (), sequential: bool = False) -> None:
+        self.macros = [(source, target) for source, target in macros if source != ""]
+        self.sequential = sequential
+        # Unique per compiled macro set, used in cache keys
+        self.version = next(_versions)
+        self.table: dict[str, str] = {}
+
+        for source, target in self.macros:
+            # An earlier row wins when two rows share the same pattern
+            self.table.setdefault(source, target)
+
+        trie: dict = {}
+        for source in self.table:
+            node = trie
+            for char in source:
+                node = node.setdefault(char, {})
+            node[""] = {}
+        # Captured, so split() puts the matches at the odd indices
+        self._pattern = re.compile(f"({_trie_pattern(trie)})") if trie else None
+
+    @classmethod
+    def from_table(cls, data: list[list], sequential: bool = False) -> "MacroReplacer":
+        """Build from MacroTable rows [from, to, enabled]"""
+        return cls([(row[0], row[1]) for row in data if row[2]], sequential)
+
+    def __bool__(self) -> bool:
+        return bool(self.macros)
+
+    def apply(self, text: str) -> str:
+        if self.sequential:
+            for source, target in self.macros:
+                text = text.replace(source, target)
+            return text
+
+        if self._pattern is None:
+            return text
+        parts = self._pattern.split(text)
+        if len(parts) == 1:
+            return text
+        parts[1::2] = map(self.table.__getitem__, parts[1::2])
+        return "".join(parts)
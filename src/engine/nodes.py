@@ -0,0 +1,62 @@
+"""Intermediate representation produced by the parser.
+
+A translation is a list of nodes. Nodes holding other nodes store them as
+lists too, so emitters walk the tree once without any lookahead.
+"""
+from dataclasses import dataclass, field
+
+@dataclass(slots=True)
+class Number:
+    text: str
+
+@dataclass(slots=True)
+class Symbol:
+    """A letter or a named symbol such as a greek letter"""
+    name: str
+
+@dataclass(slots=True)
+class Operator:
+    """Anything that is not an operand: operators, relations and delimiters"""
+    text: str
+
+@dataclass(slots=True)
+class Command:
+    """Unknown command kept verbatim so that macros can still replace it"""
+    text: str
+
+@dataclass(slots=True)
+class Text:
+    """Contents of \\text{} and the like, usually a unit"""
+    text: str
+
+@dataclass(slots=True)
+class Group:
+    """Brace group {...}"""
+    children: list = field(default_factory=list)
+
+@dataclass(slots=True)
+class Fraction:
+    numerator: Group
+    denominator: Group
+
+@dataclass(slots=True)
+class Root:
+    radicand: Group
+    index: Group | None = None
+
+@dataclass(slots=True)
+class Function:
+    name: str
+    argument: Group | None = None
+
+@dataclass(slots=True)
+class Scripted:
+    base: object
+    sub: Group | None = None
+    sup: Group | None = None
+
+@dataclass(slots=True)
+class Newline:
+    pass
+
+OPERANDS = (Number, Symbol, Text, Group, Fraction, Root, Function, Scripted, Command)
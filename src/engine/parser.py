@@ -0,0 +1,203 @@
+from engine.tokenizer import Token, COMMAND, NUMBER, LETTER, LBRACE, RBRACE, SUP, SUB, NEWLINE, SPACE, SYMBOL
+from engine.nodes import Number, Symbol, Operator, Command, Text, Group, Fraction, Root, Function, Scripted, Newline
+from engine import symbols
+
+_INVERSIBLE = {"sin", "cos", "tan"}
+
+class Parser:
+    """Recursive descent parser turning tokens into IR nodes.
+
+    Every token is consumed exactly once. The parser never raises on
+    malformed input since it runs while the user is still typing: unclosed
+    groups end at the end of input and stray closing braces are dropped.
+    Input nested deeper than Python's recursion limit is returned verbatim
+    as a single Command node.
+    """
+    def __init__(self, tokens: list[Token]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def parse(self) -> list:
+        self.pos = 0
+        try:
+            return self._parse_sequence(None)
+        except RecursionError:
+            return [Command("".join(token.text for token in self.tokens))]
+
+    def _peek(self) -> Token | None:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def _skip_spaces(self) -> Token | None:
+        while self.pos < len(self.tokens) and self.tokens[self.pos].kind == SPACE:
+            self.pos += 1
+        return self._peek()
+
+    def _parse_sequence(self, until: str | None) -> list:
+        """Parse nodes until the closing token text `until` or the end of input."""
+        nodes = []
+        while (token := self._skip_spaces()) is not None:
+            if token.text == until and token.kind in (RBRACE, SYMBOL):
+                self.pos += 1
+                break
+            if token.kind == RBRACE:
+                # Stray closing brace
+                self.pos += 1
+                continue
+
+            node = self._parse_atom()
+            if node is not None:
+                nodes.append(self._parse_scripts(node))
+        return nodes
+
+    def _parse_atom(self):
+        token = self.tokens[self.pos]
+        kind = token.kind
+
+        if kind in (SUP, SUB):
+            # Scripts without a base, e.g. ^{14}C
+            return Group()
+
+        self.pos += 1
+        if kind == NUMBER:
+            return Number(token.text)
+        if kind == LETTER:
+            return Symbol(token.text)
+        if kind == LBRACE:
+            return Group(self._parse_sequence("}"))
+        if kind == NEWLINE:
+            return Newline()
+        if kind == COMMAND:
+            return self._parse_command(token.text[1:])
+        if token.text in ("&", "~"):
+            return None
+        return Operator(token.text)
+
+    def _parse_command(self, name: str):
+        if name == "\\":
+            return Newline()
+        if name in symbols.IGNORED:
+            return None
+        if name in symbols.SIZING:
+            # \right. closes an invisible delimiter
+            token = self._skip_spaces()
+            if token is not None and token.text == ".":
+                self.pos += 1
+            return None
+        if name in symbols.FRACTIONS:
+            return Fraction(self._parse_argument(), self._parse_argument())
+        if name == "sqrt":
+            index = None
+            token = self._skip_spaces()
+            if token is not None and token.text == "[":
+                self.pos += 1
+                index = Group(self._parse_sequence("]"))
+            return Root(self._parse_argument(), index)
+        if name in symbols.ACCENTS:
+            return self._parse_argument()
+        if name in symbols.TEXT:
+            return Text(self._read_raw())
+        if name == "operatorname":
+            return self._parse_function(self._read_raw().strip())
+        if name in symbols.FUNCTIONS:
+            return self._parse_function(name)
+        if name in symbols.SYMBOLS:
+            return Symbol(symbols.SYMBOLS[name])
+        if name in symbols.OPERATORS:
+            return Operator(symbols.OPERATORS[name])
+        return Command("\\" + name)
+
+    def _parse_function(self, name: str):
+        function = Function(name)
+        node = self._parse_scripts(function)
+
+        # \sin^{-1} is arcsin
+        if isinstance(node, Scripted) and node.sub is None and name in _INVERSIBLE:
+            sup = node.sup.children
+            if len(sup) == 2 and sup[0] == Operator("-") and sup[1] == Number("1"):
+                function.name = "arc" + name
+                node = function
+
+        function.argument = self._parse_function_argument()
+        return node
+
+    def _parse_function_argument(self) -> Group | None:
+        """Argument in braces or a run of operands such as `2x` in `\\sin 2x`."""
+        token = self._skip_spaces()
+        if token is None:
+            return None
+        if token.kind == LBRACE:
+            self.pos += 1
+            return Group(self._parse_sequence("}"))
+
+        children = []
+        while token is not None and self._is_operand_start(token):
+            node = self._parse_atom()
+            if node is not None:
+                children.append(self._parse_scripts(node))
+            token = self._peek()
+        return Group(children) if children else None
+
+    def _is_operand_start(self, token: Token) -> bool:
+        if token.kind in (NUMBER, LETTER):
+            return True
+        return token.kind == COMMAND and token.text[1:] in symbols.SYMBOLS
+
+    def _parse_argument(self) -> Group:
+        """Mandatory argument: a brace group or a single token."""
+        token = self._skip_spaces()
+        if token is None or token.kind in (RBRACE, SUP, SUB, NEWLINE):
+            return Group()
+        if token.kind == LBRACE:
+            self.pos += 1
+            return Group(self._parse_sequence("}"))
+        if token.kind == NUMBER and len(token.text) > 1:
+            # \frac12 takes only the digit 1
+            self.tokens[self.pos] = Token(NUMBER, token.text[1:])
+            return Group([Number(token.text[0])])
+
+        node = self._parse_atom()
+        return Group([node] if node is not None else [])
+
+    def _parse_scripts(self, node):
+        sub = sup = None
+        while (token := self._skip_spaces()) is not None and token.kind in (SUP, SUB):
+            if (token.kind == SUP and sup is not None) or (token.kind == SUB and sub is not None):
+                # Double script, e.g. x^2^3, nests the first one
+                node = Scripted(node, sub, sup)
+                sub = sup = None
+            self.pos += 1
+            if token.kind == SUP:
+                sup = self._parse_argument()
+            else:
+                sub = self._parse_argument()
+
+        if sub is None and sup is None:
+            return node
+        return Scripted(node, sub, sup)
+
+    def _read_raw(self) -> str:
+        """Source text of the next argument, used for \\text{}."""
+        token = self._skip_spaces()
+        if token is None:
+            return ""
+        self.pos += 1
+        if token.kind != LBRACE:
+            return token.text
+
+        parts = []
+        depth = 1
+        while (token := self._peek()) is not None:
+            self.pos += 1
+            if token.kind == LBRACE:
+                depth += 1
+            elif token.kind == RBRACE:
+                depth -= 1
+                if depth == 0:
+                    break
+            parts.append(token.text)
+        return "".join(parts)
+
+def parse(tokens: list[Token]) -> list:
+    return Parser(tokens).parse()
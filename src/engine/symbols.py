@@ -0,0 +1,98 @@
+"""Lookup tables shared by the parser and the emitters."""
+
+GREEK = {
+    "alpha": "α", "beta": "β", "gamma": "γ", "delta": "δ", "epsilon": "ϵ",
+    "varepsilon": "ε", "zeta": "ζ", "eta": "η", "theta": "θ", "vartheta": "ϑ",
+    "iota": "ι", "kappa": "κ", "lambda": "λ", "mu": "μ", "nu": "ν", "xi": "ξ",
+    "pi": "π", "varpi": "ϖ", "rho": "ρ", "varrho": "ϱ", "sigma": "σ",
+    "varsigma": "ς", "tau": "τ", "upsilon": "υ", "phi": "ϕ", "varphi": "φ",
+    "chi": "χ", "psi": "ψ", "omega": "ω",
+    "Gamma": "Γ", "Delta": "Δ", "Theta": "Θ", "Lambda": "Λ", "Xi": "Ξ",
+    "Pi": "Π", "Sigma": "Σ", "Upsilon": "Υ", "Phi": "Φ", "Psi": "Ψ", "Omega": "Ω",
+}
+
+# Commands that stand for a single symbol
+SYMBOLS = {
+    **GREEK,
+    "partial": "∂", "nabla": "∇", "infty": "∞", "hbar": "ℏ", "ell": "ℓ",
+    "circ": "°", "degree": "°", "prime": "'", "angle": "∠",
+}
+
+# Commands that stand for an operator, relation or delimiter
+OPERATORS = {
+    "cdot": "*", "times": "*", "ast": "*", "div": "/",
+    "pm": "±", "mp": "∓",
+    "le": "≤", "leq": "≤", "ge": "≥", "geq": "≥",
+    "ne": "≠", "neq": "≠", "approx": "≈", "equiv": "≡",
+    "to": "→", "rightarrow": "→", "Rightarrow": "⇒", "implies": "⇒",
+    "ldots": "...", "cdots": "...", "dots": "...",
+    "lbrace": "{", "rbrace": "}", "langle": "⟨", "rangle": "⟩",
+    "vert": "|", "lvert": "|", "rvert": "|", "Vert": "‖", "|": "‖",
+    "{": "{", "}": "}", "%": "%", "$": "$", "#": "#", "&": "&", "_": "_",
+}
+
+FUNCTIONS = {
+    "sin", "cos", "tan", "cot", "sec", "csc",
+    "arcsin", "arccos", "arctan",
+    "sinh", "cosh", "tanh", "coth",
+    "ln", "log", "lg", "exp",
+    "min", "max", "gcd", "det", "lim",
+}
+
+# Commands producing no output, e.g. spacing
+IGNORED = {
+    " ", ",", ";", ":", "!", "quad", "qquad", "displaystyle", "limits",
+    "rm", "it", "bf",
+}
+
+# Sizing commands, the delimiter after them is kept
+SIZING = {
+    "left", "right", "middle",
+    "big", "Big", "bigg", "Bigg",
+    "bigl", "bigr", "Bigl", "Bigr", "biggl", "biggr", "Biggl", "Biggr",
+}
+
+# Commands whose only argument is output as is
+ACCENTS = {
+    "bar", "vec", "hat", "tilde", "dot", "ddot", "overline", "underline",
+    "widehat", "widetilde", "overrightarrow", "mathbf", "mathit", "mathsf",
+    "mathcal", "mathbb", "boldsymbol", "bm",
+}
+
+# Commands whose argument is raw text, usually a unit
+TEXT = {"text", "mathrm", "textrm", "textup", "mathup", "textnormal"}
+
+FRACTIONS = {"frac", "dfrac", "tfrac", "cfrac"}
+
+SUBSCRIPT_DIGITS = str.maketrans("0123456789", "₀₁₂₃₄₅₆₇₈₉")
+
+UNIT_PREFIXES = {
+    "T": "tera", "G": "giga", "M": "mega", "k": "kilo", "h": "hecto",
+    "da": "deca", "d": "deci", "c": "centi", "m": "milli",
+    "µ": "micro", "μ": "micro", "n": "nano", "p": "pico",
+}
+
+# Unit symbol: (TI-nspire unit, SpeedCrunch unit or None if it has none)
+UNITS = {
+    "m": ("m", "meter"), "g": ("g", "gram"), "s": ("s", "second"),
+    "A": ("A", "ampere"), "K": ("°K", "kelvin"), "mol": ("mol", "mole"),
+    "cd": ("cd", "candela"), "N": ("N", "newton"), "J": ("J", "joule"),
+    "W": ("W", "watt"), "Pa": ("Pa", "pascal"), "Hz": ("Hz", "hertz"),
+    "V": ("V", "volt"), "C": ("coul", "coulomb"), "Ω": ("Ω", "ohm"),
+    "F": ("F", "farad"), "H": ("henry", "henry"), "T": ("T", "tesla"),
+    "Wb": ("Wb", "weber"), "S": ("S", "siemens"),
+    "l": ("l", "liter"), "L": ("l", "liter"),
+    "min": ("min", "minute"), "h": ("hr", "hour"), "d": ("day", "day"),
+    "eV": ("eV", "electron_volt"), "bar": ("bar", "bar"),
+    "atm": ("atm", "atmosphere"), "rad": ("rad", "radian"),
+    "°C": ("°C", None), "°": ("°", "degree"),
+}
+
+# (symbol, subscript): TI-nspire constant
+NSPIRE_CONSTANTS = {
+    ("c", ""): "_c", ("h", ""): "_h", ("G", ""): "_Gc", ("R", ""): "_Rc",
+    ("k", "B"): "_k", ("N", "A"): "_Na",
+    ("ε", "0"): "_ε0", ("ϵ", "0"): "_ε0", ("μ", "0"): "_μ0", ("σ", ""): "_σ",
+    ("m", "e"): "_Me", ("m", "p"): "_Mp", ("m", "n"): "_Mn",
+    ("V", "m"): "_Vm", ("R", "∞"): "_Rdb",
+}
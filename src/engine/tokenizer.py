@@ -0,0 +1,34 @@
+import re
+from typing import NamedTuple
+
+COMMAND = "command"
+NUMBER  = "number"
+LETTER  = "letter"
+LBRACE  = "lbrace"
+RBRACE  = "rbrace"
+SUP     = "sup"
+SUB     = "sub"
+NEWLINE = "newline"
+SPACE   = "space"
+SYMBOL  = "symbol"
+
+_TOKEN_RE = re.compile(r"""
+      (?P<command>\\(?:[A-Za-z]+|.))
+    | (?P<number>\d+(?:\.\d+)?|\.\d+)
+    | (?P<letter>[^\W\d_])
+    | (?P<lbrace>\{)
+    | (?P<rbrace>\})
+    | (?P<sup>\^)
+    | (?P<sub>_)
+    | (?P<newline>\n)
+    | (?P<space>[ \t\r\f\v]+)
+    | (?P<symbol>.)
+""", re.VERBOSE | re.DOTALL)
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+
+def tokenize(text: str) -> list[Token]:
+    """Split LaTeX source into tokens in a single regex scan."""
+    return [Token(match.lastgroup, match.group()) for match in _TOKEN_RE.finditer(text)]
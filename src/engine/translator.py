@@ -0,0 +1,28 @@
+from engine.tokenizer import tokenize
+from engine.parser import parse
+from engine.emitters import Emitter, NspireEmitter, SpeedCrunchEmitter
+from engine.macros import MacroReplacer
+
+def get_emitter(TI_on=False, SC_on=False, constants_on=False, g_on=False, i_on=False, e_on=False) -> Emitter:
+    if TI_on:
+        return NspireEmitter(constants_on=constants_on, g_on=g_on, i_on=i_on, e_on=e_on)
+    if SC_on:
+        return SpeedCrunchEmitter()
+    return Emitter()
+
+def translate(latex: str, TI_on=False, SC_on=False, constants_on=False, g_on=False, i_on=False, e_on=False) -> str:
+    """Translate LaTeX to plain, TI-nspire CAS or SpeedCrunch input.
+
+    The TI-nspire extras (constants, g, i and e) only apply when TI_on is set.
+    Tokenizing, parsing and emitting each walk the input once. Input nested
+    too deeply to emit is returned unchanged.
+    """
+    emitter = get_emitter(TI_on, SC_on, constants_on, g_on, i_on, e_on)
+    try:
+        return emitter.emit(parse(tokenize(latex)))
+    except RecursionError:
+        return latex
+
+def translate_with_macros(latex: str, macros: MacroReplacer, **flags) -> str:
+    """Translate and apply the compiled macros."""
+    return macros.apply(translate(latex, **flags))
@@ -1,11 +1,43 @@
+import os
 import sys
-from PySide6 import QtAsyncio
-from PySide6.QtWidgets import QApplication
-
-from windows.main_window import MainWindow
+from multiprocessing import freeze_support
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
-    sys.exit(QtAsyncio.run())
\ No newline at end of file
+    freeze_support()
+
+    # Headless commands, e.g. Kalium translate, don't need Qt widgets
+    if len(sys.argv) > 1 and sys.argv[1] in ("translate", "send"):
+        from cli import main
+        sys.exit(main(sys.argv[1:]))
+
+    if "--trace-startup" in sys.argv:
+        sys.argv.remove("--trace-startup")
+        os.environ.setdefault("KALIUM_STARTUP_TRACE", "1")
+
+    from utils import startup_trace
+    from utils.startup_trace import phase
+
+    if "--new-instance" in sys.argv:
+        sys.argv.remove("--new-instance")
+    else:
+        # Raise the running window instead of starting a second one
+        with phase("single instance"):
+            from utils.single_instance import send_command
+            if send_command("raise") is not None:
+                sys.exit(0)
+
+    with phase("import PySide6"):
+        from PySide6 import QtAsyncio
+        from PySide6.QtWidgets import QApplication
+
+    with phase("import MainWindow"):
+        from windows.main_window import MainWindow
+
+    with phase("QApplication"):
+        app = QApplication(sys.argv)
+    with phase("MainWindow"):
+        window = MainWindow()
+    with phase("show"):
+        window.show()
+    startup_trace.watch_first_paint(window)
+    sys.exit(QtAsyncio.run())
@@ -0,0 +1,64 @@
+import re
+from collections import OrderedDict
+
+class StyleTemplate:
+    """QSS with [placeholder] colors, parsed once and rendered per palette.
+
+    The source is split into static segments and placeholder names, so a
+    render is one join instead of a replace over the whole stylesheet per
+    color. Renders are cached by palette. Placeholders the palette does not
+    define are left as they are, like attribute selectors such as [readOnly].
+    """
+    _placeholder = re.compile(r"\[([A-Za-z][\w-]*)\]")
+    _rule = re.compile(r"[^{}]+\{[^{}]*\}")
+    _comment = re.compile(r"/\*.*?\*/", re.DOTALL)
+
+    def __init__(self, source: str, cache_size: int = 16) -> None:
+        self.source = source
+        parts = self._placeholder.split(source)
+        self.segments: list[str] = parts[0::2]
+        self.names: list[str] = parts[1::2]
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple, str] = OrderedDict()
+        self._subsets: dict[frozenset, StyleTemplate] = {}
+        self._rules: list[tuple[list[str], str]] | None = None
+
+    def rules(self) -> list[tuple[list[str], str]]:
+        """(selectors, declarations) of every rule, placeholders left in"""
+        if self._rules is None:
+            self._rules = []
+            for rule in self._rule.finditer(self._comment.sub("", self.source)):
+                selectors, body = rule.group().split("{", 1)
+                self._rules.append(([s.strip() for s in selectors.split(",") if s.strip()], body.rstrip("}")))
+        return self._rules
+
+    def subset(self, names) -> "StyleTemplate":
+        """Template of only the rules that use one of the placeholders in names"""
+        names = frozenset(names)
+        template = self._subsets.get(names)
+        if template is None:
+            rules = [
+                rule.group() for rule in self._rule.finditer(self.source)
+                if names.intersection(self._placeholder.findall(rule.group()))
+            ]
+            template = self._subsets[names] = StyleTemplate("\n".join(rules), self.cache_size)
+        return template
+
+    def render(self, palette: dict[str, str]) -> str:
+        key = tuple(sorted(palette.items()))
+        stylesheet = self._cache.get(key)
+        if stylesheet is not None:
+            self._cache.move_to_end(key)
+            return stylesheet
+
+        out = [self.segments[0]]
+        for name, segment in zip(self.names, self.segments[1:]):
+            value = palette.get(name)
+            out.append(f"[{name}]" if value is None else value)
+            out.append(segment)
+        stylesheet = "".join(out)
+
+        self._cache[key] = stylesheet
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return stylesheet
@@ -1,3 +1,5 @@
+import re
+
 from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QColor
 
@@ -12,52 +14,123 @@ from PySide6.QtWidgets import (
 
 from utils.resource_helpers import load_and_concatenate, resource_path, exe_dir_path
 from utils.json_manager import JSONManager
+from utils.startup_trace import phase
+from ui.style_template import StyleTemplate
 from widgets import ColorPicker, ColorForm, HistoryScroll, MacroTable
 
+# Type or class name of a selector's last compound, e.g. QLineEdit in "QTableWidget QLineEdit:focus"
+_SUBJECT = re.compile(r"^((?:.*\s)?)([.\w-]*)")
+
+def _selects(selector: str, widget: QWidget) -> bool:
+    """Whether selector may apply to widget, ancestors, attributes and states are left to Qt"""
+    name = _SUBJECT.match(selector).group(2)
+    if name.startswith("."):
+        return name[1:] in str(widget.property("class") or "").split()
+    return name in ("", "*") or widget.inherits(name)
+
 class WindowUI:
     def __init__(self) -> None:
         self.style_folder_path = resource_path("src/ui/styles")
         theme_path = exe_dir_path("config/theme.json")
 
         self.cached_stylesheet = None
-        self.theme_manager = JSONManager(theme_path)
+        self.applied_stylesheet = None
+        with phase("theme.json"):
+            self.theme_manager = JSONManager(theme_path)
         self.mode = self.theme_manager.get_section("mode")
-        self.load_style(self.mode)
+        with phase("load_style"):
+            self.load_style(self.mode)
 
-        self.update_time = 300
+        # Colors being edited, applied at most once a frame until editing stops
+        self.preview_colors: dict[str, str] = {}
+        self.update_time = 16
         self.update_timer = QTimer()
-        self.update_timer.setSingleShot(False)
-        self.update_timer.stop()
-        self.update_timer.timeout.connect(lambda: self.load_style(self.mode))
+        self.update_timer.setSingleShot(True)
+        self.update_timer.timeout.connect(self._apply_preview)
+        # Widgets restyled by the preview, with the template of their own rules
+        self.preview_widgets: dict[QWidget, StyleTemplate] = {}
 
         self.finish_time = 500
         self.finish_timer = QTimer() 
         self.finish_timer.setSingleShot(True)
         self.finish_timer.timeout.connect(self.stop_loading)
 
+    def preview_color(self, placeholder: str, color: str):
+        """Show a theme color while it is edited without restyling the whole app.
+
+        Only widgets selected by a rule using an edited color are restyled,
+        each with its own stylesheet. The full stylesheet is applied once no
+        color has changed for finish_time.
+        """
+        self.preview_colors[placeholder] = color
+        if not self.update_timer.isActive():
+            self.update_timer.start(self.update_time)
+        self.finish_timer.start(self.finish_time)
+
     def request_style_update(self):
         if not self.update_timer.isActive():
             self.update_timer.start(self.update_time)
         self.finish_timer.start(self.finish_time)
 
+    def _apply_preview(self):
+        if not self.preview_colors:
+            return
+        palette = dict(self.theme_manager.get_section(self.mode), **self.preview_colors)
+        selectors = [s for rule in self._load_stylesheet().subset(self.preview_colors).rules() for s in rule[0]]
+        for widget in [self.window, *self.window.findChildren(QWidget)]:
+            template = self.preview_widgets.get(widget)
+            if template is None:
+                # Widgets with their own stylesheet keep it until the preview ends
+                if widget.styleSheet() or not any(_selects(s, widget) for s in selectors):
+                    continue
+                template = self.preview_widgets[widget] = self._widget_template(widget)
+            stylesheet = template.render(palette)
+            if stylesheet != widget.styleSheet():
+                widget.setStyleSheet(stylesheet)
+
+    def _widget_template(self, widget: QWidget) -> StyleTemplate:
+        """Every app rule that may select widget, scoped to it alone.
+
+        All of them, not only the edited ones, so the rules keep their
+        precedence over each other. The attribute keeps the rules from
+        cascading to the widget's children.
+        """
+        scope = f'[preview="{len(self.preview_widgets)}"]'
+        widget.setProperty("preview", str(len(self.preview_widgets)))
+        rules = []
+        for selectors, body in self._load_stylesheet().rules():
+            scoped = [_SUBJECT.sub(lambda m: m.group(1) + m.group(2) + scope, s, 1) for s in selectors if _selects(s, widget)]
+            if scoped:
+                rules.append(f"{', '.join(scoped)} {{{body}}}")
+        return StyleTemplate("\n".join(rules))
+
     def stop_loading(self):
         if self.update_timer.isActive():
             self.update_timer.stop()
+        if self.preview_colors:
+            for placeholder, color in self.preview_colors.items():
+                self.theme_manager.set_property(self.mode, placeholder, color)
+            self.preview_colors.clear()
+            for widget in self.preview_widgets:
+                widget.setStyleSheet("")
+            self.preview_widgets.clear()
         self.load_style(self.mode)
 
-    def _load_stylesheet(self):
+    def _load_stylesheet(self) -> StyleTemplate:
         if not self.cached_stylesheet:
-            self.cached_stylesheet = load_and_concatenate(self.style_folder_path)
+            self.cached_stylesheet = StyleTemplate(load_and_concatenate(self.style_folder_path))
         return self.cached_stylesheet
 
     def load_style(self, mode: str = "dark") -> None:
         self.mode = mode
-        stylesheet = self._load_stylesheet()
         palette = self.theme_manager.get_section(mode)
-        for placeholder, color in palette.items():
-            stylesheet = stylesheet.replace(f'[{placeholder}]', color)
+        stylesheet = self._load_stylesheet().render(palette)
 
+        # setStyleSheet repolishes every widget, skip it when nothing changed
+        if stylesheet == self.applied_stylesheet:
+            return
         QApplication.instance().setStyleSheet(stylesheet)
+        self.applied_stylesheet = stylesheet
         return
     
     def save_colors(self):
@@ -65,14 +138,32 @@ class WindowUI:
         self.theme_manager.save_data()
 
     def init_ui(self, window: QMainWindow):
-        self._init_toolbar(window)
-        self._init_io()
-        self._init_settings(window)
-        self._init_history()
-        self._init_theme(window)
-        self._finish_init(window)
+        self.window = window
+        with phase("toolbar"):
+            self._init_toolbar(window)
+        with phase("io"):
+            self._init_io()
+        with phase("settings panel"):
+            self._init_settings(window)
+        # Built the first time they are shown, see build_history_panel and build_theme_panel
+        self.history_panel = None
+        self.theme_panel = None
+        with phase("finish"):
+            self._finish_init(window)
         self._set_graphics_effects()
         return
+
+    def build_history_panel(self) -> QWidget:
+        if self.history_panel is None:
+            self._init_history()
+            self._set_focus_policies(self.history_panel)
+        return self.history_panel
+
+    def build_theme_panel(self) -> QWidget:
+        if self.theme_panel is None:
+            self._init_theme(self.window)
+            self._set_focus_policies(self.theme_panel)
+        return self.theme_panel
     
     def _init_toolbar(self, window):
         tb_layout = QHBoxLayout()
@@ -207,6 +298,10 @@ class WindowUI:
         mode_layout.addWidget(self.default_button)
         mode_layout.addLayout(mode_button_layout)
 
+        self.clipboard_watch = QPushButton("Translate copied LaTeX")
+        self.clipboard_watch.setCheckable(True)
+        mode_layout.addWidget(self.clipboard_watch)
+
         macro_layout = QVBoxLayout()
         self.macro_field = QWidget()
         self.macro_field.setLayout(macro_layout)
@@ -324,9 +419,14 @@ class WindowUI:
         scroll_btn_layout.addWidget(self.history_del)
         scroll_btn_layout.addWidget(self.history_clear)
 
+        self.history_search = QLineEdit()
+        self.history_search.setPlaceholderText("Search history (3+ characters)")
+        self.history_search.setClearButtonEnabled(True)
+
         self.history_scroll = HistoryScroll()
 
         scroll_layout.addLayout(scroll_btn_layout)
+        scroll_layout.addWidget(self.history_search)
         scroll_layout.addWidget(self.history_scroll)
 
         self.history_layout.addWidget(history_header)
@@ -446,11 +546,20 @@ class WindowUI:
         window.setCentralWidget(self.central_widget)
 
         for widget in QApplication.allWidgets():
-            if isinstance(widget, QPushButton):
-                widget.setFocusPolicy(Qt.TabFocus)
-                widget.setAutoDefault(True)
-            elif isinstance(widget, QCheckBox):
-                widget.setFocusPolicy(Qt.TabFocus)
+            self._set_focus_policy(widget)
+        return
+
+    def _set_focus_policies(self, root: QWidget):
+        for widget in root.findChildren(QWidget):
+            self._set_focus_policy(widget)
+        return
+
+    def _set_focus_policy(self, widget: QWidget):
+        if isinstance(widget, QPushButton):
+            widget.setFocusPolicy(Qt.TabFocus)
+            widget.setAutoDefault(True)
+        elif isinstance(widget, QCheckBox):
+            widget.setFocusPolicy(Qt.TabFocus)
         return
 
     def _set_graphics_effects(self):
@@ -0,0 +1,186 @@
+import time
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtWidgets import QPlainTextEdit
+
+from utils import stage_timer
+from utils.latest_worker import LatestOnlyWorker
+from utils.text_patch import replace_text, set_plain_text
+
+class BlockTranslator(QObject):
+    """Keeps the output edit in sync with the input edit one line at a time.
+
+    Every input block is translated on its own and output line i is the
+    translation of input block i. Edits reported by contentsChange only
+    re-translate the blocks they touched and only the matching output text
+    is replaced, so a keystroke costs about the size of the edited line.
+    Replacements are further narrowed to the characters that differ.
+
+    Large edits such as pastes, and full re-translations after a mode or
+    macro change, run on the background worker. The translation cache makes
+    unchanged lines cheap there and only the lines that differ are patched.
+    """
+    translated = Signal()
+
+    # Edits touching fewer characters are translated on the GUI thread
+    sync_limit = 1000
+
+    def __init__(self, source: QPlainTextEdit, target: QPlainTextEdit, cache, options) -> None:
+        """options() returns the (macros, flags) to translate with"""
+        super().__init__()
+        self.source = source.document()
+        self.target = target.document()
+        self.target.setUndoRedoEnabled(False)
+        self.cache = cache
+        self.options = options
+        self.worker = LatestOnlyWorker(self._apply, name="translation")
+
+        # Mirrors of the input blocks and of the output lines, None when out of sync
+        self.sources: list[str] | None = None
+        self.translations: list[str] | None = None
+        self.block_count = self.source.blockCount()
+        self._patching = False
+        # Set while the input is changed along with its known translation
+        self.paused = False
+
+        self.source.contentsChange.connect(self.contents_changed)
+        self.target.contentsChange.connect(self._target_changed)
+
+    def invalidate(self) -> None:
+        """Forget the mirrors after either document was changed from outside."""
+        self.worker.cancel()
+        self.sources = None
+        self.translations = None
+        self.block_count = self.source.blockCount()
+        return
+
+    def shutdown(self) -> None:
+        self.worker.shutdown()
+        return
+
+    def translate_all(self, wait: bool = False) -> None:
+        """Re-translate every line, e.g. after the mode or the macros changed."""
+        self.sources = None
+        lines = self.source.toPlainText().split("\n")
+        macros, flags = self.options()
+        timings = self._new_run("full", len(lines))
+        if wait or sum(map(len, lines)) <= self.sync_limit:
+            self._apply(self.worker.run_now(self._translate_lines, lines, macros, flags, timings))
+        else:
+            self.worker.request(self._translate_lines, lines, macros, flags, timings)
+        return
+
+    def contents_changed(self, position: int, removed: int, added: int) -> None:
+        if self.paused:
+            return
+        doc = self.source
+        old_count, self.block_count = self.block_count, doc.blockCount()
+        if self.sources is None or self.translations is None:
+            return self.translate_all()
+
+        first = doc.findBlock(position).blockNumber()
+        last = doc.findBlock(min(position + added, doc.characterCount() - 1)).blockNumber()
+        old_span = (last - first + 1) - (self.block_count - old_count)
+        if first < 0 or old_span < 1 or first + old_span > len(self.sources):
+            return self.translate_all()
+
+        lines = []
+        block = doc.findBlockByNumber(first)
+        for _ in range(last - first + 1):
+            lines.append(block.text())
+            block = block.next()
+
+        if sum(map(len, lines)) > self.sync_limit:
+            return self.translate_all()
+
+        # A pending full translation would overwrite this edit
+        self.worker.cancel()
+        macros, flags = self.options()
+        timings = self._new_run("incremental", len(lines))
+        translations = self._translate_lines(lines, macros, flags, timings)[1]
+        start = time.perf_counter()
+        self._patch(first, old_span, translations)
+        if timings is not None:
+            timings.add("output", time.perf_counter() - start)
+        self.sources[first:first + old_span] = lines
+        self.translated.emit()
+        return
+
+    @staticmethod
+    def _new_run(kind: str, lines: int):
+        recorder = stage_timer.recorder
+        return None if recorder is None else recorder.new_run(kind, lines)
+
+    def _translate_lines(self, lines: list[str], macros, flags: dict, timings=None) -> tuple:
+        return (lines, [self.cache.translate(line, macros, flags, timings) for line in lines], timings)
+
+    def _apply(self, result: tuple) -> None:
+        lines, translations, timings = result
+        began = time.perf_counter()
+        old = self.translations
+        if old is None:
+            self._set_text("\n".join(translations))
+            self.translations = list(translations)
+        else:
+            # Patch only the lines between the common prefix and suffix
+            start = 0
+            limit = min(len(old), len(translations))
+            while start < limit and old[start] == translations[start]:
+                start += 1
+            end_old, end_new = len(old), len(translations)
+            while end_old > start and end_new > start and old[end_old - 1] == translations[end_new - 1]:
+                end_old -= 1
+                end_new -= 1
+            if end_old > start or end_new > start:
+                self._patch(start, end_old - start, translations[start:end_new])
+        if timings is not None:
+            timings.add("output", time.perf_counter() - began)
+        self.sources = lines
+        self.translated.emit()
+        return
+
+    def _patch(self, first: int, old_span: int, translations: list[str]) -> None:
+        """Replace output lines first..first + old_span with translations."""
+        old = self.translations
+        if old[first:first + old_span] == translations:
+            return
+
+        # Output line i is block i, Qt keeps the block positions. Past the
+        # last block, the end of the text plus its line break.
+        block = self.target.findBlockByNumber(first)
+        start = block.position() if block.isValid() else self.target.characterCount()
+        old_text = "\n".join(old[first:first + old_span])
+        text = "\n".join(translations)
+        if old_span == 0:
+            # Pure insertion, add a line break between the new and old lines
+            if first < len(old):
+                text += "\n"
+            else:
+                start -= 1
+                text = "\n" + text
+        elif not translations:
+            # Pure deletion, remove one line break with the lines
+            if first + old_span < len(old):
+                old_text += "\n"
+            elif first > 0:
+                start -= 1
+                old_text = "\n" + old_text
+
+        self._patching = True
+        replace_text(self.target, start, old_text, text)
+        self._patching = False
+
+        old[first:first + old_span] = translations
+        return
+
+    def _set_text(self, text: str) -> None:
+        self._patching = True
+        set_plain_text(self.target, text)
+        self._patching = False
+        return
+
+    def _target_changed(self, position: int, removed: int, added: int) -> None:
+        if not self._patching:
+            # Edited by the user or set from history
+            self.translations = None
+        return
@@ -0,0 +1,57 @@
+import re
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QClipboard
+
+# A command or a braced script, e.g. \frac, \alpha, x^{2}, a_{0}
+_LATEX = re.compile(r"\\[A-Za-z]+|[\^_]\{")
+# Windows paths and UNC paths look like commands
+_PATH = re.compile(r"^\s*(?:[A-Za-z]:\\|\\\\)")
+
+def looks_like_latex(text: str) -> bool:
+    return bool(_LATEX.search(text)) and not _PATH.match(text)
+
+class ClipboardWatcher(QObject):
+    """Translates LaTeX as soon as it is copied and puts the result on the clipboard.
+
+    Driven by QClipboard.dataChanged only, so it costs nothing while idle.
+    translated is emitted with the latex and its translation.
+    """
+    translated = Signal(str, str)
+
+    # Larger clipboard contents are not LaTeX worth translating
+    max_length = 10_000
+
+    def __init__(self, clipboard: QClipboard, translate, parent: QObject | None = None) -> None:
+        """translate(latex) returns the translation"""
+        super().__init__(parent)
+        self.clipboard = clipboard
+        self.translate = translate
+        self.active = False
+        self._written: str | None = None
+
+    def set_active(self, active: bool) -> None:
+        if active == self.active:
+            return
+        self.active = active
+        if active:
+            self.clipboard.dataChanged.connect(self._data_changed)
+        else:
+            self.clipboard.dataChanged.disconnect(self._data_changed)
+        return
+
+    def _data_changed(self) -> None:
+        text = self.clipboard.text()
+        # Our own translation coming back
+        if text == self._written or not text or len(text) > self.max_length:
+            return
+        if not looks_like_latex(text):
+            return
+
+        translation = self.translate(text)
+        if not translation or translation == text:
+            return
+        self._written = translation
+        self.clipboard.setText(translation)
+        self.translated.emit(text, translation)
+        return
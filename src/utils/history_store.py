@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+
+# Largest SQLite rowid
+_MAX_ID = 2 ** 63 - 1
+
+class HistoryStore:
+    """Translation history in an SQLite file.
+
+    Every entry is written when it is added, so nothing is lost if the app
+    does not close cleanly, and an append costs one insert no matter how
+    long the history is. Entries are read a page at a time, newest first.
+    A history.json from older versions is imported when the file is created.
+
+    Both columns are indexed by an FTS5 trigram table kept up to date by
+    triggers, so substring searches do not scan the history. Without FTS5,
+    or for queries shorter than a trigram, search falls back to LIKE, which
+    scans every entry. Callers should not search for fewer than min_query
+    characters, search_query() turns typed text into what to search for.
+    """
+    # Shortest query the trigram index can answer
+    min_query = 3
+
+    def __init__(self, path: str, legacy_json: str | None = None) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        created = not os.path.exists(path)
+
+        self.connection = sqlite3.connect(path)
+        # WAL makes the commit after each append cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, latex TEXT NOT NULL, translation TEXT NOT NULL)"
+        )
+        self.connection.commit()
+        self.fts = self._create_index()
+
+        if created and legacy_json and os.path.exists(legacy_json):
+            self._import_json(legacy_json)
+        return
+
+    def _create_index(self) -> bool:
+        exists = self.connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'history_fts'"
+        ).fetchone()
+        if exists:
+            return True
+        try:
+            with self.connection:
+                self.connection.executescript("""
+                    CREATE VIRTUAL TABLE history_fts USING fts5(
+                        latex, translation, content='history', content_rowid='id', tokenize='trigram'
+                    );
+                    CREATE TRIGGER history_ai AFTER INSERT ON history BEGIN
+                        INSERT INTO history_fts(rowid, latex, translation) VALUES (new.id, new.latex, new.translation);
+                    END;
+                    CREATE TRIGGER history_ad AFTER DELETE ON history BEGIN
+                        INSERT INTO history_fts(history_fts, rowid, latex, translation)
+                        VALUES ('delete', old.id, old.latex, old.translation);
+                    END;
+                    INSERT INTO history_fts(history_fts) VALUES ('rebuild');
+                """)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or the trigram tokenizer
+            return False
+        return True
+
+    def _import_json(self, path: str) -> None:
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        # Oldest first, the order history.json was saved in
+        rows = [(item[0], item[1]) for item in data if isinstance(item, list) and len(item) >= 2]
+        self.extend(rows)
+        return
+
+    def append(self, latex: str, translation: str) -> int:
+        """Add an entry and return its id"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO history (latex, translation) VALUES (?, ?)", (latex, translation)
+            )
+        return cursor.lastrowid
+
+    def extend(self, rows: list[tuple[str, str]]) -> None:
+        """Add entries given oldest first"""
+        with self.connection:
+            self.connection.executemany("INSERT INTO history (latex, translation) VALUES (?, ?)", rows)
+        return
+
+    def page(self, before: int | None = None, limit: int = 200) -> list[tuple[int, str, str]]:
+        """Up to limit (id, latex, translation) rows older than id before, newest first"""
+        if before is None:
+            query = "SELECT id, latex, translation FROM history ORDER BY id DESC LIMIT ?"
+            return self.connection.execute(query, (limit,)).fetchall()
+        query = "SELECT id, latex, translation FROM history WHERE id < ? ORDER BY id DESC LIMIT ?"
+        return self.connection.execute(query, (before, limit)).fetchall()
+
+    @classmethod
+    def search_query(cls, text: str) -> str:
+        """The query to search for typed text, "" when it is too short to search"""
+        text = text.strip()
+        return text if len(text) >= cls.min_query else ""
+
+    def search(self, query: str, before: int | None = None, limit: int = 200) -> list[tuple[int, str, str]]:
+        """Like page but only entries whose latex or translation contains query, ignoring case"""
+        if before is None:
+            before = _MAX_ID
+        if self.fts and len(query) >= self.min_query:
+            phrase = '"' + query.replace('"', '""') + '"'
+            return self.connection.execute(
+                "SELECT rowid, latex, translation FROM history_fts "
+                "WHERE history_fts MATCH ? AND rowid < ? ORDER BY rowid DESC LIMIT ?",
+                (phrase, before, limit)
+            ).fetchall()
+
+        pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return self.connection.execute(
+            "SELECT id, latex, translation FROM history "
+            "WHERE id < ? AND (latex LIKE ? ESCAPE '\\' OR translation LIKE ? ESCAPE '\\') "
+            "ORDER BY id DESC LIMIT ?",
+            (before, pattern, pattern, limit)
+        ).fetchall()
+
+    def delete(self, entry_id: int) -> None:
+        with self.connection:
+            self.connection.execute("DELETE FROM history WHERE id = ?", (entry_id,))
+        return
+
+    def clear(self) -> None:
+        with self.connection:
+            self.connection.execute("DELETE FROM history")
+        self.compact()
+        return
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def compact(self) -> None:
+        """Give the space of deleted entries back and fold the WAL into the file"""
+        self.connection.execute("VACUUM")
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return
+
+    def close(self) -> None:
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.connection.close()
+        return
@@ -0,0 +1,13 @@
+"""JSON validation run in a worker process by JSONValidator.
+
+Kept free of Qt imports, the worker imports this module to run validate().
+"""
+import json
+
+def validate(text: str) -> tuple[int, int, str] | None:
+    """None when text is valid JSON, else the error's line, column and message, 1-based"""
+    try:
+        json.loads(text)
+    except json.JSONDecodeError as e:
+        return (e.lineno, e.colno, e.msg)
+    return None
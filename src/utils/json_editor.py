@@ -1,7 +1,9 @@
+import re
 import json
+import bisect
 
-from PySide6.QtCore import Qt, QRegularExpression, QSize, QRect
-from PySide6.QtGui import QColor, QTextCharFormat, QSyntaxHighlighter, QTextFormat, QPainter, QFontMetrics, QTextCursor
+from PySide6.QtCore import Qt, QSize, QRect, QEvent
+from PySide6.QtGui import QColor, QTextCharFormat, QSyntaxHighlighter, QTextFormat, QPainter, QPixmap, QTextCursor
 from PySide6.QtWidgets import QPlainTextEdit, QTextEdit, QWidget
 
 try:
@@ -9,9 +11,32 @@ try:
 except:
     from json_manager import JSONManager
 
+# Block states, PENDING marks a block left unhighlighted until it is shown
+NORMAL, IN_COMMENT, IN_STRING = 0, 1, 2
+PENDING = 4
+
+_TOKEN = re.compile(r"""
+    (?P<comment>//.*|/\*.*?\*/)
+  | (?P<open_comment>/\*)
+  | (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<open_string>"(?:[^"\\]|\\.)*(?P<continued>\\)?)
+  | (?P<number>\b[0-9]+(?:\.[0-9]+)?\b)
+  | (?P<word>\b[A-Za-z_]\w*\b)
+""", re.VERBOSE)
+# The rest of a string continued from the previous line
+_STRING_REST = re.compile(r'(?:[^"\\]|\\.)*(?:(")|(\\))?')
+
 class SyntaxHighlighter(QSyntaxHighlighter):
+    """Highlights JSON, plus comments and Python keywords, in one pass per block.
+
+    Comments and strings continued with a trailing backslash carry over to
+    the next block through the block state. When visible_range is set,
+    blocks outside it are only scanned for what they carry over and get
+    the PENDING state, highlight_range() highlights them once they are shown.
+    """
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.visible_range: tuple[int, int] | None = None
 
         self.default = QTextCharFormat()
         self.default.setForeground(QColor("#FFFFFF"))
@@ -48,23 +73,77 @@ class SyntaxHighlighter(QSyntaxHighlighter):
             'global', 'nonlocal', 'not', 'or', 'in', 'pass'
         ]
 
-    def highlightBlock(self, text):
-        self.setFormat(0, len(text), self.default)
-        patterns = [
-            (self.keyword_purple, QRegularExpression(fr'\b({"|".join(self.py_kw_purple)})\b')),
-            (self.keyword_blue, QRegularExpression(fr'\b({"|".join(self.py_kw_blue)})\b')),
-            (self.string,  QRegularExpression(r'"([^"\\]*(\\.[^"\\]*)*)"')),
-            (self.number,  QRegularExpression(r'\b[0-9]+(\.[0-9]+)?\b')),
-            (self.bool,    QRegularExpression(r'\b(true|false)\b')),
-            (self.null,    QRegularExpression(r'\bnull\b')),
-            (self.comment, QRegularExpression(r'//.*|/\*[\s\S]*?\*/'))
-        ]
+        self.keywords = dict.fromkeys(self.py_kw_purple, self.keyword_purple)
+        self.keywords.update(dict.fromkeys(self.py_kw_blue, self.keyword_blue))
+        self.keywords.update({'true': self.bool, 'false': self.bool, 'null': self.null})
+
+    def highlight_range(self, first: int, last: int) -> None:
+        """Set the visible blocks and highlight the pending ones among them"""
+        self.visible_range = (first, last)
+        document = self.document()
+        block = document.findBlockByNumber(max(0, first))
+        while block.isValid() and block.blockNumber() <= last:
+            if block.userState() >= 0 and block.userState() & PENDING:
+                self.rehighlightBlock(block)
+            block = block.next()
+        return
 
-        for format, pattern in patterns:
-            iterator = pattern.globalMatch(text)
-            while iterator.hasNext():
-                match = iterator.next()
-                self.setFormat(match.capturedStart(), match.capturedLength(), format)
+    def highlightBlock(self, text):
+        previous = self.previousBlockState()
+        state = previous & ~PENDING if previous >= 0 else NORMAL
+
+        if self.visible_range is not None and state == NORMAL:
+            first, last = self.visible_range
+            if not first <= self.currentBlock().blockNumber() <= last \
+                    and "/*" not in text and not text.endswith("\\"):
+                # Nothing carries over, highlight it when it is shown
+                self.setCurrentBlockState(NORMAL | PENDING)
+                return
+
+        length = len(text)
+        self.setFormat(0, length, self.default)
+        pos = 0
+        if state == IN_COMMENT:
+            end = text.find("*/")
+            if end < 0:
+                self.setFormat(0, length, self.comment)
+                self.setCurrentBlockState(IN_COMMENT)
+                return
+            pos = end + 2
+            self.setFormat(0, pos, self.comment)
+        elif state == IN_STRING:
+            match = _STRING_REST.match(text)
+            pos = match.end()
+            self.setFormat(0, pos, self.string)
+            if match.group(2):
+                self.setCurrentBlockState(IN_STRING)
+                return
+
+        state = NORMAL
+        for match in _TOKEN.finditer(text, pos):
+            kind = match.lastgroup
+            start = match.start()
+            if kind == "word":
+                format = self.keywords.get(match.group())
+                if format is not None:
+                    self.setFormat(start, match.end() - start, format)
+            elif kind == "number":
+                self.setFormat(start, match.end() - start, self.number)
+            elif kind == "string":
+                self.setFormat(start, match.end() - start, self.string)
+            elif kind == "comment":
+                self.setFormat(start, match.end() - start, self.comment)
+            elif kind == "open_comment":
+                self.setFormat(start, length - start, self.comment)
+                state = IN_COMMENT
+                break
+            else:
+                # An unterminated string runs to the end of the line
+                self.setFormat(start, length - start, self.string)
+                if match.group("continued"):
+                    state = IN_STRING
+                break
+        self.setCurrentBlockState(state)
 
 class CodeEditorOld(QPlainTextEdit):
     def __init__(self, file_path: str):
@@ -101,18 +180,31 @@ class CodeEditorOld(QPlainTextEdit):
 class JSONEditor(QPlainTextEdit):
     def __init__(self, parent=None):
         super().__init__(parent)
+        # Gutter caches: digit glyphs per color, digit width and the visible block layout
+        self._digits: dict[tuple, list[QPixmap]] = {}
+        self._digit_advance = 0
+        self._gutter_width = -1
+        self._layout_key = None
+        self._layout: tuple[list[int], list[int], list[int]] = ([], [], [])
+
         tab_spaces = 6
         self.setTabStopDistance(tab_spaces * self.fontMetrics().horizontalAdvance(' '))
 
         self.line_number_area = NumberLine(self)
         self.padding_left = 10
         self.padding_right = 2
+        # Blocks highlighted above and below the viewport
+        self.highlight_margin = 100
 
         # Set initial highlight
         self.highlighted_line = -1
         self.line_highlight_color        = QColor("#262626")
         self.line_number_color           = QColor("Gray")
         self.highlight_line_number_color = QColor("#FFFFFF")
+        self.error_color                 = QColor("#F14C4C")
+
+        # Block number of the JSON error shown in the gutter
+        self.error_line = -1
 
         self.json_manager = JSONManager()
         self.highlighter = SyntaxHighlighter(self.document())
@@ -124,24 +216,79 @@ class JSONEditor(QPlainTextEdit):
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
         self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.verticalScrollBar().valueChanged.connect(self.highlight_visible)
         return
 
     def load_json(self, path: str):
-        data = self.json_manager.load_data(path)
-        self.setPlainText(json.dumps(data, indent="\t"))
+        self.json_manager.set_data_from_file(path)
+        # Only the first screen is highlighted while the text is set
+        self.highlighter.visible_range = (0, self.highlight_margin)
+        self.setPlainText(json.dumps(self.json_manager.get_data(), indent="\t"))
+        self.highlight_visible()
+
+    def highlight_visible(self, *_):
+        numbers = self.visible_blocks()[2] or [self.firstVisibleBlock().blockNumber()]
+        self.highlighter.highlight_range(numbers[0] - self.highlight_margin, numbers[-1] + self.highlight_margin)
     
     def save_json(self):
         json_data: dict | list = json.loads(self.toPlainText())
         self.json_manager.set_data(json_data)
         self.json_manager.save_data()
 
+    def set_error(self, line: int, message: str = "") -> None:
+        """Mark block number line in the gutter, -1 clears the marker"""
+        self.error_line = line
+        self.line_number_area.setToolTip(message)
+        self.line_number_area.update()
+        return
+
     def line_number_area_width(self):
         digits = len(str(max(1, self.blockCount())))
-        space = 10 + self.fontMetrics().horizontalAdvance('9') * digits + self.padding_left+ self.padding_right
+        space = 10 + self._digit_width() * digits + self.padding_left+ self.padding_right
         return space
 
     def update_line_number_area_width(self, _):
-        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+        # Only changes with the number of digits
+        width = self.line_number_area_width()
+        if width != self._gutter_width:
+            self._gutter_width = width
+            self.setViewportMargins(width, 0, 0, 0)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.FontChange:
+            self._digits.clear()
+            self._digit_advance = 0
+            self._gutter_width = -1
+            self._layout_key = None
+            self.update_line_number_area_width(0)
+
+    def _digit_width(self) -> int:
+        if not self._digit_advance:
+            metrics = self.fontMetrics()
+            self._digit_advance = max(metrics.horizontalAdvance(digit) for digit in "0123456789")
+        return self._digit_advance
+
+    def _digit_glyphs(self, color: QColor) -> list[QPixmap]:
+        """0-9 rendered once per color and pixel ratio, line numbers are drawn from these"""
+        ratio = self.line_number_area.devicePixelRatioF()
+        key = (color.rgba(), ratio)
+        glyphs = self._digits.get(key)
+        if glyphs is None:
+            width, height = self._digit_width(), self.fontMetrics().height()
+            glyphs = []
+            for digit in "0123456789":
+                pixmap = QPixmap(int(width * ratio + 0.5), int(height * ratio + 0.5))
+                pixmap.setDevicePixelRatio(ratio)
+                pixmap.fill(Qt.transparent)
+                painter = QPainter(pixmap)
+                painter.setFont(self.font())
+                painter.setPen(color)
+                painter.drawText(QRect(0, 0, width, height), Qt.AlignRight, digit)
+                painter.end()
+                glyphs.append(pixmap)
+            self._digits[key] = glyphs
+        return glyphs
 
     def update_line_number_area(self, rect, dy):
         if dy:
@@ -158,6 +305,7 @@ class JSONEditor(QPlainTextEdit):
         # Resize the line number area widget
         cr = self.contentsRect()
         self.line_number_area.setGeometry(QRect(cr.left(), cr.top(), self.line_number_area_width(), cr.height()))
+        self.highlight_visible()
 
     def highlight_current_line(self):
         extraSelections = []
@@ -171,48 +319,77 @@ class JSONEditor(QPlainTextEdit):
             extraSelections.append(selection)
         self.setExtraSelections(extraSelections)
 
+    def visible_blocks(self) -> tuple[list[int], list[int], list[int]]:
+        """Tops, bottoms and numbers of the blocks in the viewport.
+
+        Laid out once per scroll position, edit and width, painting the
+        gutter and block_at_y() reuse it.
+        """
+        key = (
+            self.firstVisibleBlock().blockNumber(), self.contentOffset().y(),
+            self.document().revision(), self.viewport().width(), self.viewport().height(),
+        )
+        if key == self._layout_key:
+            return self._layout
+        tops, bottoms, numbers = [], [], []
+        block = self.firstVisibleBlock()
+        top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
+        height = self.viewport().height()
+        while block.isValid() and top <= height:
+            bottom = top + int(self.blockBoundingRect(block).height())
+            if block.isVisible():
+                tops.append(top)
+                bottoms.append(bottom)
+                numbers.append(block.blockNumber())
+            block = block.next()
+            top = bottom
+        self._layout_key = key
+        self._layout = (tops, bottoms, numbers)
+        return self._layout
+
     def line_number_area_paint_event(self, event):
         painter = QPainter(self.line_number_area)
         painter.fillRect(event.rect(), QColor("#2B2B2B"))
 
-        block = self.firstVisibleBlock()
-        block_number = block.blockNumber()
-        top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        bottom = top + int(self.blockBoundingRect(block).height())
-        font_height = QFontMetrics(self.font()).height()
+        font_height = self.fontMetrics().height()
+        digit_width = self._digit_width()
+        right = self.line_number_area.width() - 5 - self.padding_right
 
         # Determine the current line number for highlighting
         current_line = self.textCursor().blockNumber()
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-
-                # Set color based on whether it’s the current line
-                if block_number == current_line:
-                    painter.setPen(self.highlight_line_number_color)
-                else:
-                    painter.setPen(self.line_number_color)
-
-                painter.drawText(
-                    -self.padding_right, top, self.line_number_area.width() - 5,font_height,
-                    Qt.AlignRight, number
-                )
-            block = block.next()
-            top = bottom
-            bottom = top + int(self.blockBoundingRect(block).height())
-            block_number += 1
+        tops, bottoms, numbers = self.visible_blocks()
+        first = bisect.bisect_left(bottoms, event.rect().top())
+        last = bisect.bisect_right(tops, event.rect().bottom())
+        for top, block_number in zip(tops[first:last], numbers[first:last]):
+            # Set color based on whether it’s the current line
+            if block_number == self.error_line:
+                painter.setPen(self.error_color)
+                painter.setBrush(self.error_color)
+                painter.drawEllipse(4, top + (font_height - 6) // 2, 6, 6)
+                glyphs = self._digit_glyphs(self.error_color)
+            elif block_number == current_line:
+                glyphs = self._digit_glyphs(self.highlight_line_number_color)
+            else:
+                glyphs = self._digit_glyphs(self.line_number_color)
+
+            number = str(block_number + 1)
+            x = right - digit_width * len(number)
+            for digit in number:
+                painter.drawPixmap(x, top, glyphs[ord(digit) - 48])
+                x += digit_width
 
     def block_at_y(self, y):
-        """Return the block number at the given y-coordinate."""
-        block = self.firstVisibleBlock()
-        top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-        while block.isValid() and top <= y:
-            if top + self.blockBoundingRect(block).height() > y:
-                return block.blockNumber()
-            block = block.next()
-            top += self.blockBoundingRect(block).height()
-        return -1
+        """Return the block number at the given y-coordinate.
+
+        Above or below the text the first or last visible block, so drag
+        selections can leave the gutter.
+        """
+        tops, bottoms, numbers = self.visible_blocks()
+        if not numbers:
+            return -1
+        index = bisect.bisect_right(tops, y) - 1
+        return numbers[min(max(index, 0), len(numbers) - 1)]
 
     def select_line(self, block_number):
         """Select the entire line corresponding to the block_number."""
@@ -1,19 +1,123 @@
+import hashlib
 import json
 import os
+import threading
+import time
+
+# Modification times can be this coarse, e.g. on FAT
+_MTIME_RESOLUTION_NS = 2_000_000_000
 
 class JSONManager():
+    """Loads a JSON file and writes changes back behind the caller's back.
+
+    The setters mark the data dirty and schedule a save after save_delay
+    seconds, so a burst of changes is written once. Writes happen on a
+    timer thread and go through a temporary file and os.replace, so the
+    file is never left half written. flush() writes pending changes right
+    away and waits for them, call it before exiting.
+
+    The (mtime, size) and a hash of the file are remembered whenever it is
+    read or written. update() only parses the file again when its contents
+    changed, and trusts an unchanged (mtime, size) alone only when the
+    mtime is too old for a later save to have left it the same. watch()
+    reloads on changes made outside Kalium.
+    """
+    save_delay = 1.0
+
     def __init__(self, filepath=None):
         self.default_data = None
         self.filepath = filepath
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._stat: tuple[int, int] | None = None
+        self._stat_time = 0
+        self._digest: bytes | None = None
+        self._watcher = None
+        self._watch_callback = None
+        self._watch_error_callback = None
+        self.data: dict | list | None = None
         if self.filepath:
-            self.data: dict | list = self.load_data(self.filepath)
+            self.data = self.load_data(self.filepath)
         return
     
-    def update(self):
-        self.data = self.load_data(self.filepath)
+    def update(self) -> bool:
+        """Reload the file if it changed since it was last read or written.
+
+        Changes on disk replace changes that were not written yet. Returns
+        whether the data was reloaded. Raises ValueError, keeping the
+        current data, when the file is not valid JSON.
+        """
+        with self._lock:
+            stat = self._file_stat(self.filepath)
+            if stat is not None and stat == self._stat and stat[0] + _MTIME_RESOLUTION_NS < self._stat_time:
+                return False
+            with open(self.filepath, 'rb') as file:
+                raw = file.read()
+            if hashlib.sha1(raw).digest() == self._digest:
+                self._remember(stat, raw)
+                return False
+            data = json.loads(raw)
+            self._cancel_timer()
+            self.data = data
+            self.dirty = False
+            self._remember(stat, raw)
+        return True
+
+    def _remember(self, stat: tuple[int, int] | None, raw: bytes) -> None:
+        self._stat = stat
+        self._stat_time = time.time_ns()
+        self._digest = hashlib.sha1(raw).digest()
+        return
+
+    def watch(self, callback=None, error_callback=None) -> None:
+        """Reload whenever the file changes on disk and call callback(data).
+
+        Uses a QFileSystemWatcher, so it needs a QApplication. Writes by
+        this manager do not trigger the callback. When the new contents are
+        not valid JSON the data is kept and error_callback(error) is called.
+        """
+        from PySide6.QtCore import QFileSystemWatcher
+        self._watch_callback = callback
+        self._watch_error_callback = error_callback
+        self._watcher = QFileSystemWatcher([self.filepath])
+        self._watcher.fileChanged.connect(self._file_changed)
+        return
+
+    def _file_changed(self, path: str) -> None:
+        # Saving through a replace drops the file from the watch list
+        if path not in self._watcher.files() and os.path.exists(path):
+            self._watcher.addPath(path)
+        try:
+            reloaded = self.update()
+        except OSError:
+            # Removed or being replaced, wait for the next change
+            return
+        except ValueError as e:
+            if self._watch_error_callback is not None:
+                self._watch_error_callback(e)
+            return
+        if reloaded and self._watch_callback is not None:
+            self._watch_callback(self.data)
+        return
+
+    @staticmethod
+    def _file_stat(path: str) -> tuple[int, int] | None:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
     
     def set_data(self, data):
-        self.data = data
+        """Replace the data, only scheduling a save when it differs"""
+        with self._lock:
+            # The same object may have been changed in place, save it then
+            if data is not self.data and data == self.data:
+                return
+            self.data = data
+            self.mark_dirty()
         return
     
     def set_data_from_file(self, path) -> None:
@@ -22,11 +126,15 @@ class JSONManager():
     
     def append(self, data):
         """if list append data to it"""
-        self.data.append(data)
+        with self._lock:
+            self.data.append(data)
+            self.mark_dirty()
 
     def remove(self, index):
         """if list remove data at index"""
-        del self.data[index]
+        with self._lock:
+            del self.data[index]
+            self.mark_dirty()
     
     def get_data(self):
         return self.data
@@ -34,21 +142,88 @@ class JSONManager():
     def load_data(self, path):
         self.filepath = path
         if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as file:
-                return json.load(file)
+            stat = self._file_stat(path)
+            with open(path, 'rb') as file:
+                raw = file.read()
+            data = json.loads(raw)
+            self._remember(stat, raw)
+            return data
         else:
             self._create_default_data_file()
             return self.load_data()
 
     def save_data(self) -> None:
-        """Method for writing to data file."""
-        with open(self.filepath, 'w', encoding='utf-8') as file:
-            json.dump(self.data, file, indent='\t')
+        """Method for writing to data file. Writes now on the calling thread."""
+        self._cancel_timer()
+        self._write_pending(force=True)
+        return
+
+    def flush(self) -> None:
+        """Write pending changes now and wait for a save in progress"""
+        self._cancel_timer()
+        self._write_pending()
+        return
+
+    def mark_dirty(self) -> None:
+        """Schedule a save of the data, restarting the delay if one is pending"""
+        with self._lock:
+            self.dirty = True
+            if not self.filepath:
+                return
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.save_delay, self._write_pending)
+            self._timer.daemon = True
+            self._timer.start()
+        return
+
+    def _cancel_timer(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _write_pending(self, force: bool = False) -> None:
+        # Holding the write lock keeps two saves from racing on the temp file
+        with self._write_lock:
+            with self._lock:
+                if not (self.dirty or force):
+                    return
+                # Serialized under the lock, the setters cannot change it meanwhile
+                text = json.dumps(self.data, indent='\t')
+                self.dirty = False
+            try:
+                self._write_atomic(text)
+            except OSError:
+                # Still unsaved, the next flush or change tries again
+                self.dirty = True
+                raise
+        return
+
+    def _write_atomic(self, text: str) -> None:
+        temp_path = f"{self.filepath}.tmp"
+        # Bytes as written, so the remembered hash matches the file
+        raw = text.replace("\n", os.linesep).encode("utf-8")
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(raw)
+                file.flush()
+                os.fsync(file.fileno())
+        except OSError:
+            # The file itself is untouched, only drop the partial copy
+            os.remove(temp_path)
+            raise
+        with self._lock:
+            os.replace(temp_path, self.filepath)
+            # A watcher seeing this write must not reload it
+            self._remember(self._file_stat(self.filepath), raw)
         return
 
     def set_section(self, section: str, value) -> None:
-        if section in self.data:
-            self.data[section] = value
+        with self._lock:
+            if section in self.data and self.data[section] != value:
+                self.data[section] = value
+                self.mark_dirty()
         return
     
     def get_section(self, section: str) -> list | dict:
@@ -56,12 +231,15 @@ class JSONManager():
             return self.data[section]
 
     def set_property(self, section: str, key: str, value) -> None:
-        """General method to update any setting. DOES NOT SAVE THE FILE"""
-        if section in self.data and key in self.data[section]:
-            self.data[section][key] = value
-            return
-        else:
-            raise KeyError(f"Invalid property: {section}.{key}")
+        """General method to update any setting. Saved after save_delay, see flush()"""
+        with self._lock:
+            if section in self.data and key in self.data[section]:
+                if self.data[section][key] != value:
+                    self.data[section][key] = value
+                    self.mark_dirty()
+                return
+            else:
+                raise KeyError(f"Invalid property: {section}.{key}")
 
     def get_property(self, section: str, key: str):
         if section in self.data and key in self.data[section]:
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QTextDocument
+
+from utils.json_check import validate
+from utils.latest_worker import LatestOnlyWorker
+
+class JSONValidator(QObject):
+    """Validates a document as JSON in a worker process while it is edited.
+
+    Parsing starts once edits pause for `delay` ms and only when the
+    document's revision changed, so format-only changes such as syntax
+    highlighting never trigger it. json.loads holds the GIL for the whole
+    parse, a separate process keeps the GUI responsive on large files.
+    validated is emitted with validate()'s result for the latest revision.
+    """
+    validated = Signal(object)
+
+    def __init__(self, document: QTextDocument, delay: int = 400, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.document = document
+        self.error: tuple[int, int, str] | None = None
+        # Revision and text last sent to the worker, the text is assumed valid as loaded
+        self._requested = document.revision()
+        self._text: str | None = None
+
+        # The process is only started by the first validation
+        self.worker = LatestOnlyWorker(self._done, ProcessPoolExecutor(max_workers=1))
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.validate_now)
+        self.document.contentsChanged.connect(self._contents_changed)
+
+    def _contents_changed(self) -> None:
+        if self.document.revision() != self._requested:
+            self.timer.start()
+        return
+
+    def validate_now(self) -> None:
+        self.timer.stop()
+        revision = self.document.revision()
+        if revision == self._requested:
+            return
+        self._requested = revision
+        text = self.document.toPlainText()
+        # E.g. undone back to the text that was sent last
+        if text == self._text:
+            return
+        self._text = text
+        self.worker.request(validate, text)
+        return
+
+    def shutdown(self) -> None:
+        self.timer.stop()
+        self.worker.shutdown()
+        return
+
+    def _done(self, error: tuple[int, int, str] | None) -> None:
+        # Dropped by the worker unless it is for the latest request
+        self.error = error
+        self.validated.emit(error)
+        return
@@ -0,0 +1,52 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+class LatestOnlyWorker:
+    """Runs jobs off the GUI thread and delivers only the latest result.
+
+    Used for translations and for JSON validation. A new request cancels
+    the previous one: a queued job never starts and the result of a job
+    that is already running is dropped. The callback is invoked on the
+    event loop thread so it may touch widgets.
+    """
+    def __init__(self, callback, executor: Executor | None = None, name: str = "worker") -> None:
+        """executor defaults to a single thread called name"""
+        self.callback = callback
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.task: asyncio.Task | None = None
+        self.generation = 0
+
+    def request(self, func, *args, **kwargs) -> None:
+        self.cancel()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Event loop not started yet, e.g. while the window is being built
+            self.callback(func(*args, **kwargs))
+            return
+        self.task = loop.create_task(self._run(loop, self.generation, func, args, kwargs))
+        return
+
+    def run_now(self, func, *args, **kwargs):
+        """Cancel pending work and run func synchronously."""
+        self.cancel()
+        return func(*args, **kwargs)
+
+    def cancel(self) -> None:
+        self.generation += 1
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+        self.task = None
+        return
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        return
+
+    async def _run(self, loop, generation: int, func, args, kwargs) -> None:
+        result = await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+        if generation == self.generation:
+            self.callback(result)
+        return
@@ -0,0 +1,73 @@
+import time
+
+from PySide6.QtCore import Qt, QObject, QVariantAnimation, QSequentialAnimationGroup, QEasingCurve, QAbstractAnimation
+from PySide6.QtWidgets import QProgressBar
+
+from utils import stage_timer
+
+class ProgressAnimator(QObject):
+    """Runs the progress bar once after each translation.
+
+    The bar fills with a degree 4 ease in, then empties from the left with
+    the mirrored curve. Qt's animation timer drives it, one update per
+    frame at most, and a slow frame just jumps ahead to the current time.
+    Starting again while the bar is still filling does nothing, so typing
+    does not restart the animation on every keystroke.
+    """
+    fill_time = 300
+    empty_time = 200
+
+    def __init__(self, progressbar: QProgressBar, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.progressbar = progressbar
+        self.timings = None
+
+        self.fill = self._animation(0.0, 100.0, self.fill_time, QEasingCurve.InQuart)
+        # 1 - (1 - t)^4, the fill curve run backwards
+        self.empty = self._animation(100.0, 0.0, self.empty_time, QEasingCurve.OutQuart)
+        self.fill.finished.connect(lambda: self.progressbar.setLayoutDirection(Qt.RightToLeft))
+
+        self.group = QSequentialAnimationGroup(self)
+        self.group.addAnimation(self.fill)
+        self.group.addAnimation(self.empty)
+        self.group.finished.connect(self._reset)
+
+    def _animation(self, start: float, end: float, duration: int, easing) -> QVariantAnimation:
+        animation = QVariantAnimation(self)
+        animation.setStartValue(start)
+        animation.setEndValue(end)
+        animation.setDuration(duration)
+        animation.setEasingCurve(easing)
+        animation.valueChanged.connect(self._set_value)
+        return animation
+
+    def start(self) -> None:
+        running = self.group.state() == QAbstractAnimation.Running
+        if running and self.group.currentAnimation() is self.fill:
+            return
+        recorder = stage_timer.recorder
+        self.timings = None if recorder is None else recorder.last()
+        self.group.stop()
+        self._reset()
+        self.group.start()
+        return
+
+    def stop(self) -> None:
+        self.group.stop()
+        self._reset()
+        return
+
+    def _reset(self) -> None:
+        self.progressbar.setValue(0)
+        self.progressbar.setLayoutDirection(Qt.LeftToRight)
+        return
+
+    def _set_value(self, value: float) -> None:
+        # QProgressBar ignores values it already shows
+        if self.timings is None:
+            self.progressbar.setValue(int(value))
+            return
+        start = time.perf_counter()
+        self.progressbar.setValue(int(value))
+        self.timings.add("animation", time.perf_counter() - start)
+        return
@@ -2,9 +2,12 @@ import os
 import sys
 
 def exe_dir_path(relative_path):
-    relative_path = relative_path.replace("/", "\\")
+    relative_path = os.path.normpath(relative_path)
 
-    if getattr(sys, 'frozen', False):
+    if os.environ.get("KALIUM_HOME"):
+        # config/ and data/ somewhere else, e.g. for benchmarks/startup.py
+        base_path = os.environ["KALIUM_HOME"]
+    elif getattr(sys, 'frozen', False):
         base_path = os.path.dirname(sys.executable)
     else:
         base_path = os.path.abspath(".")
@@ -12,7 +15,7 @@ def exe_dir_path(relative_path):
 
 def resource_path(relative_path):
     """Get absolute path to resource in dev and in exe"""
-    relative_path = relative_path.replace("/", "\\")
+    relative_path = os.path.normpath(relative_path)
     try:
         # PyInstaller creates a temp folder and stores the path in _MEIPASS
         base_path = sys._MEIPASS
@@ -0,0 +1,117 @@
+"""Hand commands from later launches to the running Kalium over a local socket.
+
+The running instance listens on a QLocalServer named per user. A later
+launch connects, sends one JSON line {"command": ..., **args} and reads one
+JSON line back, {"ok": true, "result": ...} or {"ok": false, "error": ...},
+without loading any of Kalium's files.
+"""
+import getpass
+import hashlib
+import json
+
+from PySide6.QtCore import QObject
+from PySide6.QtNetwork import QLocalServer, QLocalSocket
+
+def server_name() -> str:
+    user = hashlib.sha1(getpass.getuser().encode("utf-8")).hexdigest()[:12]
+    return f"kalium-{user}"
+
+def send_command(command: str, connect_timeout: int = 200, timeout: int = 5000, **args) -> dict | None:
+    """Send command to the running instance, None when there is none"""
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(connect_timeout):
+        return None
+
+    socket.write((json.dumps({"command": command, **args}) + "\n").encode("utf-8"))
+    socket.waitForBytesWritten(timeout)
+
+    data = b""
+    while not data.endswith(b"\n"):
+        if not socket.waitForReadyRead(timeout):
+            break
+        data += socket.readAll().data()
+    socket.disconnectFromServer()
+
+    return parse_response(data)
+
+def parse_response(data: bytes) -> dict:
+    """The reply to send_command, an error reply when it is cut off or not JSON"""
+    if not data:
+        return {"ok": False, "error": "No response from the running instance"}
+    try:
+        response = json.loads(data)
+    except ValueError:
+        response = None
+    if not isinstance(response, dict):
+        return {"ok": False, "error": "Invalid response from the running instance"}
+    return response
+
+class InstanceServer(QObject):
+    """Answers commands from later launches.
+
+    handlers maps a command name to a function called with the request's
+    other fields as keyword arguments. Its return value is sent back as
+    the result and exceptions are sent back as the error.
+    """
+    def __init__(self, handlers: dict, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.handlers = handlers
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._new_connection)
+        self._buffers: dict[QLocalSocket, bytes] = {}
+
+    def listen(self) -> bool:
+        """Start listening, False when another instance already is"""
+        name = server_name()
+        if self.server.listen(name):
+            return True
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(200):
+            # A running instance, e.g. this one was started with --new-instance
+            probe.disconnectFromServer()
+            return False
+        # Nobody answers, left behind by an instance that crashed
+        QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def close(self) -> None:
+        self.server.close()
+        return
+
+    def _new_connection(self) -> None:
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self._read(socket))
+            socket.disconnected.connect(lambda socket=socket: self._forget(socket))
+        return
+
+    def _forget(self, socket: QLocalSocket) -> None:
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
+        return
+
+    def _read(self, socket: QLocalSocket) -> None:
+        data = self._buffers.get(socket, b"") + socket.readAll().data()
+        if not data.endswith(b"\n"):
+            self._buffers[socket] = data
+            return
+        self._buffers[socket] = b""
+        socket.write((json.dumps(self._handle(data)) + "\n").encode("utf-8"))
+        socket.flush()
+        socket.disconnectFromServer()
+        return
+
+    def _handle(self, data: bytes) -> dict:
+        try:
+            request = json.loads(data)
+            handler = self.handlers[request.pop("command")]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return {"ok": False, "error": "Unknown or malformed command"}
+        try:
+            return {"ok": True, "result": handler(**request)}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
@@ -0,0 +1,86 @@
+"""Opt-in per-stage timing of the translation pipeline.
+
+Set KALIUM_TIMINGS=1 to record how long each translation run spends in
+translate(), the macros, the output update and the progress bar animation.
+When the variable is not set `recorder` is None and call sites only pay
+for an `is not None` check.
+"""
+import json
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+STAGES = ("translate", "macros", "output", "animation")
+
+class StageTimings:
+    """Wall times of one translation run, filled in from any thread"""
+    __slots__ = ("started", "kind", "lines", "stages", "cache_hits")
+
+    def __init__(self, kind: str, lines: int) -> None:
+        self.started = time.time()
+        self.kind = kind
+        self.lines = lines
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.cache_hits = 0
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "started": self.started,
+            "kind": self.kind,
+            "lines": self.lines,
+            "cache_hits": self.cache_hits,
+            "stages": dict(self.stages),
+            "total": sum(self.stages.values()),
+        }
+
+class StageRecorder:
+    """Ring buffer of the latest translation runs"""
+    def __init__(self, capacity: int = 1000) -> None:
+        self.records: deque[StageTimings] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def new_run(self, kind: str, lines: int) -> StageTimings:
+        timings = StageTimings(kind, lines)
+        with self._lock:
+            self.records.append(timings)
+        return timings
+
+    def last(self) -> StageTimings | None:
+        with self._lock:
+            return self.records[-1] if self.records else None
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            records = list(self.records)
+        return [record.as_dict() for record in records]
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Mean, median and max milliseconds per stage"""
+        records = self.snapshot()
+        summary = {}
+        for stage in (*STAGES, "total"):
+            values = [(r["total"] if stage == "total" else r["stages"][stage]) * 1e3 for r in records]
+            if values:
+                summary[stage] = {
+                    "mean": statistics.fmean(values),
+                    "median": statistics.median(values),
+                    "max": max(values),
+                }
+        return summary
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def dump(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({"summary": self.summary(), "runs": self.snapshot()}, file, indent='\t')
+
+ENABLED = os.environ.get("KALIUM_TIMINGS", "") not in ("", "0")
+recorder: StageRecorder | None = StageRecorder() if ENABLED else None
@@ -0,0 +1,121 @@
+"""Opt-in watchdog for the GUI event loop.
+
+Set KALIUM_STALL_MONITOR=1 to measure how late a heartbeat timer on the
+main loop fires and to catch handlers that block it. A watchdog thread
+takes the main thread's Python stack when the heartbeat is more than
+KALIUM_STALL_MS (default 100) late, so the stall is recorded with what was
+running at the time. Lateness of every beat goes into a histogram, see
+StallMonitor.report() and export().
+"""
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+from PySide6.QtCore import QObject, QTimer
+
+ENABLED = os.environ.get("KALIUM_STALL_MONITOR", "") not in ("", "0")
+DEFAULT_THRESHOLD_MS = 100.0
+
+# Upper bounds of the histogram buckets in ms, the last bucket is open
+BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+def threshold_ms() -> float:
+    """KALIUM_STALL_MS, read when a monitor is created so a bad value cannot break startup"""
+    value = os.environ.get("KALIUM_STALL_MS", "")
+    if not value:
+        return DEFAULT_THRESHOLD_MS
+    try:
+        threshold = float(value)
+    except ValueError:
+        threshold = 0.0
+    if not 0 < threshold < float("inf"):
+        print(f"Kalium: invalid KALIUM_STALL_MS {value!r}, using {DEFAULT_THRESHOLD_MS:.0f}", file=sys.stderr)
+        return DEFAULT_THRESHOLD_MS
+    return threshold
+
+class StallMonitor(QObject):
+    interval = 50
+    # Stalls kept with their stacks
+    max_stalls = 200
+
+    def __init__(self, threshold: float | None = None, parent: QObject | None = None) -> None:
+        """threshold in ms, defaults to KALIUM_STALL_MS"""
+        super().__init__(parent)
+        self.threshold = (threshold_ms() if threshold is None else threshold) / 1e3
+        self.histogram = [0] * (len(BUCKETS) + 1)
+        self.stalls: list[dict] = []
+        self.beats = 0
+
+        self._main_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._pending: dict | None = None
+        self._lock = threading.Lock()
+        self._running = False
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.interval)
+        self.timer.timeout.connect(self._beat)
+        self._thread = threading.Thread(target=self._watch, name="stall-monitor", daemon=True)
+
+    def start(self) -> None:
+        self._running = True
+        self._last_beat = time.perf_counter()
+        self.timer.start()
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        self._running = False
+        self.timer.stop()
+        return
+
+    def _beat(self) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            late = max(0.0, now - self._last_beat - self.interval / 1e3)
+            self._last_beat = now
+            self.beats += 1
+            self.histogram[bisect.bisect_right(BUCKETS, late * 1e3)] += 1
+            stall, self._pending = self._pending, None
+        if stall is not None:
+            stall["duration_ms"] = late * 1e3
+            self.stalls.append(stall)
+            del self.stalls[:-self.max_stalls]
+            where = stall["stack"][-1].strip().splitlines()[0] if stall["stack"] else "?"
+            print(f"Kalium: event loop blocked for {late * 1e3:.0f} ms at {where}", file=sys.stderr)
+        return
+
+    def _watch(self) -> None:
+        while self._running:
+            time.sleep(self.threshold / 2)
+            with self._lock:
+                blocked = time.perf_counter() - self._last_beat - self.interval / 1e3
+                if blocked < self.threshold or self._pending is not None:
+                    continue
+                frame = sys._current_frames().get(self._main_id)
+                # Finished and given its duration by the next beat
+                self._pending = {
+                    "time": time.time(),
+                    "stack": traceback.format_stack(frame) if frame is not None else [],
+                }
+        return
+
+    def report(self) -> dict:
+        labels = [f"<{bound}" for bound in BUCKETS] + [f">={BUCKETS[-1]}"]
+        return {
+            "threshold_ms": self.threshold * 1e3,
+            "interval_ms": self.interval,
+            "beats": self.beats,
+            "lateness_ms": dict(zip(labels, self.histogram)),
+            "stalls": list(self.stalls),
+        }
+
+    def export(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent='\t')
+        return
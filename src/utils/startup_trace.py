@@ -0,0 +1,90 @@
+"""Opt-in trace of where startup time goes.
+
+Run with --trace-startup or KALIUM_STARTUP_TRACE=1 to print the duration
+of each startup phase, slowest first, once the main window has painted.
+KALIUM_STARTUP_TRACE=json prints the same as JSON and KALIUM_STARTUP_EXIT=1
+quits right after the first paint, which is what benchmarks/startup.py uses.
+Phases nest, a phase opened inside another is reported as outer/inner.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+MODE = os.environ.get("KALIUM_STARTUP_TRACE", "")
+ENABLED = MODE not in ("", "0")
+EXIT_AFTER_PAINT = os.environ.get("KALIUM_STARTUP_EXIT", "") not in ("", "0")
+
+# Close enough to the start of main.py, which imports this first
+_start = time.perf_counter()
+_stack: list[str] = []
+phases: list[tuple[str, float, float]] = []
+first_paint: float | None = None
+
+_disabled = nullcontext()
+
+@contextmanager
+def _phase(name: str):
+    _stack.append(name)
+    path = "/".join(_stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((path, start - _start, time.perf_counter() - start))
+        _stack.pop()
+
+def phase(name: str):
+    """Context manager timing one startup phase, a no-op when tracing is off"""
+    return _phase(name) if ENABLED else _disabled
+
+def report() -> dict:
+    return {
+        "first_paint": first_paint,
+        "phases": [
+            {"name": name, "start": start, "duration": duration}
+            for name, start, duration in sorted(phases, key=lambda p: p[2], reverse=True)
+        ],
+    }
+
+def print_report(file=sys.stderr) -> None:
+    data = report()
+    if MODE == "json":
+        print(json.dumps(data), file=file)
+        return
+    total = first_paint or 1.0
+    print("Kalium startup, slowest phases first", file=file)
+    print(f"{'phase':50} {'ms':>9} {'start ms':>9} {'share':>6}", file=file)
+    for item in data["phases"]:
+        print(f"{item['name']:50} {item['duration'] * 1e3:9.1f} {item['start'] * 1e3:9.1f} "
+              f"{item['duration'] / total:6.1%}", file=file)
+    if first_paint is not None:
+        print(f"{'first paint':50} {first_paint * 1e3:9.1f}", file=file)
+    return
+
+def watch_first_paint(widget) -> None:
+    """Record the first paint of widget, then report and optionally quit"""
+    if not ENABLED:
+        return
+    from PySide6.QtCore import QObject, QEvent, QTimer
+    from PySide6.QtWidgets import QApplication
+
+    class PaintFilter(QObject):
+        def eventFilter(self, source, event) -> bool:
+            global first_paint
+            if event.type() == QEvent.Paint and first_paint is None:
+                first_paint = time.perf_counter() - _start
+                source.removeEventFilter(self)
+                # Report after the paint has finished
+                QTimer.singleShot(0, _finish)
+            return False
+
+    def _finish():
+        print_report()
+        if EXIT_AFTER_PAINT:
+            QApplication.instance().quit()
+
+    widget._startup_paint_filter = PaintFilter(widget)
+    widget.installEventFilter(widget._startup_paint_filter)
+    return
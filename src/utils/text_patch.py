@@ -0,0 +1,61 @@
+from PySide6.QtGui import QTextCursor, QTextDocument
+
+def utf16_length(text: str) -> int:
+    """Length in UTF-16 code units, which Qt text positions count"""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+def _prefix_length(a: str, b: str) -> int:
+    # Binary search over slice comparisons, which run at C speed
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _suffix_length(a: str, b: str, limit: int) -> int:
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def diff_range(old: str, new: str) -> tuple[int, int, str]:
+    """Smallest edit turning old into new as (start, end, replacement).
+
+    Offsets are Python string indices, so a surrogate pair is never split.
+    """
+    prefix = _prefix_length(old, new)
+    suffix = _suffix_length(old, new, min(len(old), len(new)) - prefix)
+    return (prefix, len(old) - suffix, new[prefix:len(new) - suffix])
+
+def replace_text(document: QTextDocument, position: int, old: str, new: str) -> bool:
+    """Replace `old`, found at `position` in the document, with `new`.
+
+    position is a document position, counted in UTF-16 code units.
+
+    Only the differing middle part is touched, with a single cursor edit,
+    so the layout, scroll position and selection outside it are kept.
+    Returns False if the texts were equal and nothing was done.
+    """
+    if old == new:
+        return False
+    start, end, replacement = diff_range(old, new)
+    cursor = QTextCursor(document)
+    cursor.beginEditBlock()
+    cursor.setPosition(position + utf16_length(old[:start]))
+    cursor.setPosition(position + utf16_length(old[:end]), QTextCursor.KeepAnchor)
+    cursor.insertText(replacement)
+    cursor.endEditBlock()
+    return True
+
+def set_plain_text(document: QTextDocument, text: str) -> bool:
+    """Minimal-diff replacement for QPlainTextEdit.setPlainText."""
+    return replace_text(document, 0, document.toPlainText(), text)
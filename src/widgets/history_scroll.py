@@ -1,121 +1,251 @@
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtWidgets import QVBoxLayout, QSizePolicy
-from PySide6.QtWidgets import QWidget, QLabel, QScrollArea 
+from PySide6.QtCore import Qt, Signal, QAbstractListModel, QModelIndex, QRect, QSize
+from PySide6.QtWidgets import QWidget, QListView, QStyledItemDelegate, QAbstractItemView
 
-class HistoryScroll(QScrollArea):
+from utils.history_store import HistoryStore
+
+class HistoryModel(QAbstractListModel):
+    """History entries with the newest one in row 0.
+
+    Entries are (id, latex, translation) tuples. New entries are kept oldest
+    first and pages fetched from the store newest first, so both appending
+    and loading older pages are O(1) per entry. Without a store the model
+    only keeps entries in memory and their ids are None. With a query only
+    the stored entries containing it are shown.
+    """
+    LatexRole = Qt.UserRole + 1
+    page_size = 200
+
+    def __init__(self, parent: QWidget | None = None, store: HistoryStore | None = None, query: str = "") -> None:
+        super().__init__(parent)
+        self.store = store
+        self.query = query
+        self.recent: list[tuple] = []
+        self.older: list[tuple] = []
+        self._exhausted = store is None
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.recent) + len(self.older)
+
+    def entry(self, row: int) -> tuple:
+        recent = self.recent
+        if row < len(recent):
+            return recent[len(recent) - 1 - row]
+        return self.older[row - len(recent)]
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        _, latex, translation = self.entry(index.row())
+        if role == Qt.DisplayRole:
+            return translation
+        if role == self.LatexRole:
+            return latex
+        return None
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:
+        if parent.isValid() or self._exhausted:
+            return
+        if self.older:
+            before = self.older[-1][0]
+        elif self.recent:
+            before = self.recent[0][0]
+        else:
+            before = None
+        if self.query:
+            rows = self.store.search(self.query, before, self.page_size)
+        else:
+            rows = self.store.page(before, self.page_size)
+        self._exhausted = len(rows) < self.page_size
+        if rows:
+            count = self.rowCount()
+            self.beginInsertRows(QModelIndex(), count, count + len(rows) - 1)
+            self.older.extend(rows)
+            self.endInsertRows()
+
+    def append(self, expression: str, translation: str) -> None:
+        entry_id = self.store.append(expression, translation) if self.store else None
+        query = self.query.casefold()
+        if query and query not in expression.casefold() and query not in translation.casefold():
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.recent.append((entry_id, expression, translation))
+        self.endInsertRows()
+
+    def extend(self, data: list[list[str]]) -> None:
+        """Show entries given oldest first without writing them to the store"""
+        if not data:
+            return
+        self.beginInsertRows(QModelIndex(), 0, len(data) - 1)
+        self.recent.extend((None, item[0], item[1]) for item in data)
+        self.endInsertRows()
+
+    def remove(self, row: int) -> None:
+        entry_id = self.entry(row)[0]
+        if self.store and entry_id is not None:
+            self.store.delete(entry_id)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        recent = self.recent
+        if row < len(recent):
+            del recent[len(recent) - 1 - row]
+        else:
+            del self.older[row - len(recent)]
+        self.endRemoveRows()
+
+    def clear(self) -> None:
+        if self.store:
+            self.store.clear()
+        self.beginResetModel()
+        self.recent.clear()
+        self.older.clear()
+        self._exhausted = True
+        self.endResetModel()
+
+class HistoryDelegate(QStyledItemDelegate):
+    """Word wrapped rows with their heights cached per view width"""
+    # Same as the .history::item padding in classes.qss, plus a 1px border
+    padding = QSize(12 + 1, 9 + 1)
+
+    def __init__(self, view: QListView) -> None:
+        super().__init__(view)
+        self.view = view
+        self._width = 0
+        self._heights: dict[str, int] = {}
+
+    def sizeHint(self, option, index: QModelIndex) -> QSize:
+        width = max(self.view.viewport().width() - 2 * self.padding.width(), 1)
+        if width != self._width:
+            self._width = width
+            self._heights.clear()
+
+        text = index.data(Qt.DisplayRole)
+        height = self._heights.get(text)
+        if height is None:
+            rect = option.fontMetrics.boundingRect(QRect(0, 0, width, 0), Qt.TextWordWrap, text)
+            height = self._heights[text] = rect.height() + 2 * self.padding.height()
+        return QSize(width, height)
+
+    def clear_cache(self) -> None:
+        self._heights.clear()
+
+class HistoryScroll(QListView):
     """Signal itemPressed emits the latex and translation the item has"""
     itemPressed = Signal(list)
     historyCleared = Signal()
 
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
-        self.num_buttons = 0
-        self.max_buttons = 100
-
-        self.content_layout = QVBoxLayout()
-        self.content_layout.setAlignment(Qt.AlignTop)
-        self.content_layout.setSpacing(0)
-
-        self.content_widget = QWidget()
-        self.content_widget.setLayout(self.content_layout)
-
-        self.setWidget(self.content_widget)
-        self.setWidgetResizable(True)
-        self.setFocusPolicy(Qt.NoFocus)
+        # In memory until set_store is called
+        self.history_model = HistoryModel(self)
+        self.delegate = HistoryDelegate(self)
+        self.setModel(self.history_model)
+        self.setItemDelegate(self.delegate)
+        self.setProperty("class", "history")
+
+        # Rows are laid out in batches, so long histories do not block startup
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
+        self.setResizeMode(QListView.Adjust)
+        self.setUniformItemSizes(False)
+        self.setWordWrap(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)
+        self.viewport().setCursor(Qt.PointingHandCursor)
+        self.setFocusPolicy(Qt.TabFocus)
+
+        self.pressed.connect(self._item_pressed)
 
         self.deleting = False
         self._update_stylesheet()
         return
-    
+
     def _update_stylesheet(self):
         # NÄÄ ON SAMA KUIN DANGER-SMALL!
         self.setStyleSheet("""
-            QWidget[delete="true"] QLabel:hover {
-                background: 1px solid #FF4242;
+            HistoryScroll[delete="true"]::item:hover {
+                background: #FF4242;
                 color: white;
             }
 
-            QWidget[delete="true"] QLabel:focus {
+            HistoryScroll[delete="true"]::item:focus {
                 outline: none;
                 border: 1px solid #FF4242;
             }
         """)
-    
-    def _label_pressed(self, label: QLabel):
+
+    def _item_pressed(self, index: QModelIndex):
+        if not index.isValid():
+            return
         if self.deleting:
-            self.delete(label)
+            self.delete(index.row())
         else:
-            self.itemPressed.emit([label.property("latex"), label.text()])
+            self.itemPressed.emit([index.data(HistoryModel.LatexRole), index.data(Qt.DisplayRole)])
 
-    def _label_key_press(self, event, label: QLabel):
+    def keyPressEvent(self, event):
         # Check for Enter/Return key
         if event.key() == Qt.Key_Return or event.key() == Qt.Key_Enter:
-            self._label_pressed(label)
+            self._item_pressed(self.currentIndex())
+        else:
+            super().keyPressEvent(event)
 
     def deleting_mode(self, deleting: bool):
         self.deleting = deleting
         self.setProperty("delete", deleting)
         self._update_stylesheet()
 
-    def delete(self, widget: QWidget):
-        next = self.content_layout.indexOf(widget) + 1
-        if next_item := self.content_layout.itemAt(next):
-            next_item.widget().setFocus()
-        elif prev_item := self.content_layout.itemAt(next - 2):
-            prev_item.widget().setFocus()
-        else:
+    def delete(self, row: int):
+        self.history_model.remove(row)
+        if self.history_model.rowCount() == 0 and self.history_model.canFetchMore():
+            self.history_model.fetchMore()
+        count = self.history_model.rowCount()
+        if count == 0:
             self.setFocus()
-
-        self.content_layout.removeWidget(widget)
-        widget.deleteLater()
-        self.num_buttons -= 1
-        if self.content_layout.count() == 0:
             self.historyCleared.emit()
+        else:
+            # Focus the next entry, or the previous one when the last was removed
+            self.setCurrentIndex(self.history_model.index(min(row, count - 1)))
         return
 
     def clear(self):
-        while self.content_layout.count() > 0:
-            item = self.content_layout.itemAt(0)
-            widget = item.widget()
-            if widget:
-                self.delete(widget)
+        if self.history_model.rowCount() == 0:
+            return
+        self.history_model.clear()
+        self.delegate.clear_cache()
+        self.historyCleared.emit()
         return
 
     def append(self, expression: str, translation: str) -> None:
-        label = QLabel(translation)
-        label.setProperty("latex", expression)
-        label.setProperty("class", "toolbutton")
-        label.setObjectName(str(self.num_buttons))
-        label.setCursor(Qt.PointingHandCursor)
-        label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-        label.setFocusPolicy(Qt.TabFocus)
-
-        label.setWordWrap(True)
-        label.setMinimumWidth(5)
-        label.mousePressEvent = lambda ev: self._label_pressed(label)
-        label.keyPressEvent = lambda ev: self._label_key_press(ev, label)
-
-        self.content_layout.insertWidget(0, label)
-
-        for i in range(1, self.content_layout.count()):
-            current_widget = self.content_layout.itemAt(i - 1).widget()
-            next_widget = self.content_layout.itemAt(i).widget()
-            self.content_widget.setTabOrder(current_widget, next_widget)
-
-        if self.num_buttons >= self.max_buttons:
-            oldest = self.content_layout.itemAt(self.max_buttons).widget()
-            self.delete(oldest)
-        else:
-            self.num_buttons += 1
+        self.history_model.append(expression, translation)
         return
 
     def append_list(self, data: list[list[str]]) -> None:
-        for item in data:
-            self.append(item[0], item[1])
+        self.history_model.extend(data)
         return
 
-    def get_history_data(self) -> list[list[str]]:
-        data = []
-        for item in self.content_widget.findChildren(QLabel):
-            data.append([item.property("latex"), item.text()])
-        return data
\ No newline at end of file
+    def set_store(self, store: HistoryStore, query: str = "") -> None:
+        """Show the history saved in store, older pages load when scrolled to"""
+        old_model = self.history_model
+        self.history_model = HistoryModel(self, store, query)
+        self.setModel(self.history_model)
+        old_model.deleteLater()
+        self.history_model.fetchMore()
+        return
+
+    def search(self, query: str) -> None:
+        """Only show the entries whose latex or translation contain query.
+
+        Shorter queries than the store's min_query show the whole history,
+        they would have to scan every entry.
+        """
+        store = self.history_model.store
+        if store is None:
+            return
+        query = store.search_query(query)
+        if query != self.history_model.query:
+            self.set_store(store, query)
+        return
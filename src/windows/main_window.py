@@ -1,4 +1,5 @@
-import asyncio
+import sys
+import time
 
 from PySide6.QtCore import Qt, QPoint, QEvent
 from PySide6.QtWidgets import QApplication, QMainWindow, QWidget
@@ -6,14 +7,21 @@ from PySide6.QtGui import QClipboard, QKeySequence, QShortcut, QIcon, QColor
 
 from ui.ui import WindowUI
 from widgets.message_boxes import new_error_box
-from windows.sub_windows import AboutWindow, InfoWindow, EditorWindow
+from windows.sub_windows import AboutWindow, InfoWindow, EditorWindow, TimingsWindow
 from utils.json_manager import JSONManager
 from utils.resource_helpers import resource_path, exe_dir_path
-from engine.old_engine import translate
+from utils.block_translator import BlockTranslator
+from utils.text_patch import set_plain_text
+from utils.history_store import HistoryStore
+from utils.single_instance import InstanceServer
+from utils.clipboard_watcher import ClipboardWatcher
+from utils.progress_animator import ProgressAnimator
+from utils import stage_timer, stall_monitor
+from utils.startup_trace import phase
+from engine import MacroReplacer, TranslationCache
 
 class MainWindow(QMainWindow):
     clipboard = QClipboard()
-    async_tasks = []
     old_pos = None
     split = [100,100] 
 
@@ -26,27 +34,53 @@ class MainWindow(QMainWindow):
         QApplication.instance().setAttribute(Qt.AA_EnableHighDpiScaling)
 
         settings = exe_dir_path("config/settings.json")
-        history = exe_dir_path("data/history.json")
+        history = exe_dir_path("data/history.db")
         macros = exe_dir_path("data/macros.json")
 
-        self.settings_manager = JSONManager(settings)
-        self.history_manager = JSONManager(history)
-        self.macro_manager = JSONManager(macros)
-
-        self.ui = WindowUI()
-        self.ui.init_ui(self)
-        self._init_signals()
-        self._load_data()
+        with phase("settings.json"):
+            self.settings_manager = JSONManager(settings)
+        with phase("history store"):
+            # Imports the history.json of older versions on first start
+            self.history_store = HistoryStore(history, legacy_json=exe_dir_path("data/history.json"))
+        with phase("macros.json"):
+            self.macro_manager = JSONManager(macros)
+            self.macro_manager.watch(self._reload_macro_table, self._macro_file_error)
+            # Set while the table shows data that is already on disk
+            self._reloading_macros = False
+        self.macro_replacer = MacroReplacer()
+        self.translation_cache = TranslationCache(maxsize=512)
+        self.stall_monitor = stall_monitor.StallMonitor(parent=self) if stall_monitor.ENABLED else None
+
+        with phase("WindowUI"):
+            self.ui = WindowUI()
+        with phase("init_ui"):
+            self.ui.init_ui(self)
+        self.block_translator = BlockTranslator(self.ui.i_text_edit, self.ui.o_text_edit, self.translation_cache, self._translation_options)
+        with phase("signals"):
+            self._init_signals()
+        with phase("load data"):
+            self._load_data()
+        self._start_instance_server()
+        if self.stall_monitor is not None:
+            self.stall_monitor.start()
         self.setFocus()
         return
+
+    def _start_instance_server(self):
+        """Let later launches raise this window and translate through it"""
+        self.instance_server = InstanceServer({
+            "raise":     self._raise_window,
+            "quick":     self._quick_translate_command,
+            "translate": self._translate_command,
+        }, parent=self)
+        self.instance_server.listen()
+        return
     
     def _init_signals(self):
         self._setup_toolbar_signals()
         self._setup_text_edit_signals()
         self._setup_macro_signals()
         self._setup_misc_controls()
-        self._setup_history_signals()
-        self._setup_theme_signals()
         self._setup_shortcuts()
         self.installEventFilter(self)
         return
@@ -59,8 +93,13 @@ class MainWindow(QMainWindow):
         self.ui.copy_button.clicked.connect(self._copy_text)
         self.ui.quick_button.clicked.connect(self._quick_translate)
 
+        self.clipboard_watcher = ClipboardWatcher(QApplication.clipboard(), self._translate_command, parent=self)
+        self.clipboard_watcher.translated.connect(self._record_history)
+        self.ui.clipboard_watch.toggled.connect(self._toggle_clipboard_watch)
+
         self.ui.show_legacy.clicked.connect(lambda: self._toggle_legacy_controls(not self.ui.g.isVisible()))
         self.ui.legacy_buttons.buttonToggled.connect(self._start_translation)
+        self.ui.legacy_buttons.buttonToggled.connect(self._store_legacy_flags)
 
         return
 
@@ -71,8 +110,8 @@ class MainWindow(QMainWindow):
         tb.mouseReleaseEvent = self.drag_end
 
         self.ui.settings_button.clicked.connect(lambda: self._change_panel(self.ui.settings_panel))
-        self.ui.history_button.clicked.connect(lambda: self._change_panel(self.ui.history_panel))
-        self.ui.theme_button.clicked.connect(lambda: self._change_panel(self.ui.theme_panel))
+        self.ui.history_button.clicked.connect(lambda: self._change_panel(self._history_panel()))
+        self.ui.theme_button.clicked.connect(lambda: self._change_panel(self._theme_panel()))
         self.ui.about_button.clicked.connect(lambda: self._open_sub_window(AboutWindow))
         self.ui.info_button.clicked.connect(lambda: self._open_sub_window(InfoWindow))
 
@@ -85,7 +124,8 @@ class MainWindow(QMainWindow):
         
         ie_ref.keyPressEvent = lambda event: self.tab_event(ie_ref, event)
         oe_ref.keyPressEvent = lambda event: self.tab_event(oe_ref, event)
-        ie_ref.textChanged.connect(lambda: self._start_translation())
+        self.progress_animator = ProgressAnimator(self.ui.progressbar, parent=self)
+        self.block_translator.translated.connect(self.progress_animator.start)
         return
 
     def _setup_theme_signals(self):
@@ -95,6 +135,7 @@ class MainWindow(QMainWindow):
             self.ui.color_line.setText(color.name())
 
         self.ui.color_picker.colorChanged.connect(on_picker_color_changed)
+        self.ui.color_form.colorChanged.connect(self._preview_theme_color)
         self.ui.color_form.boxPressed.connect(lambda box: self.ui.color_picker.set_color(self.ui.color_form.get_box_color(box)))
         self.ui.dark.toggled.connect(lambda: self._choose_theme_mode("dark"))
         self.ui.light.toggled.connect(lambda: self._choose_theme_mode("light"))
@@ -103,22 +144,30 @@ class MainWindow(QMainWindow):
     def _setup_history_signals(self):
         def load_history_text(data):
             latex, translation = data
+            # contentsChange comes from the document, which blockSignals on the edit does not block
+            self.block_translator.paused = True
             self.ui.i_text_edit.blockSignals(True)
             self.ui.i_text_edit.setPlainText(latex)
-            self.ui.o_text_edit.setPlainText(translation)
+            set_plain_text(self.ui.o_text_edit.document(), translation)
             self.ui.i_text_edit.blockSignals(False)
+            self.block_translator.paused = False
+            # Keep the translation from history until the next edit
+            self.block_translator.invalidate()
             return
 
         self.ui.history_scroll.itemPressed.connect(load_history_text)
         self.ui.history_scroll.historyCleared.connect(lambda: self.ui.history_del.setChecked(False))
         self.ui.history_del.toggled.connect(self.ui.history_scroll.deleting_mode)
         self.ui.history_clear.pressed.connect(self.ui.history_scroll.clear)
+        self.ui.history_search.textChanged.connect(self.ui.history_scroll.search)
         return
 
     def _setup_macro_signals(self):
         # print(exe_dir_path("data/macros.json"))
+        # Compile before _start_translation runs for the same signal
+        self.ui.macro_table.macrosChanged.connect(self._compile_macros)
         self.ui.open_macros_btn.clicked.connect(lambda: self._open_file_editor(exe_dir_path("data/macros.json"), self._update_macro_table))
-        self.ui.macro_table.macrosChanged.connect(lambda data: self.macro_manager.set_data(data))
+        self.ui.macro_table.macrosChanged.connect(self._store_macros)
         self.ui.show_macros_button.clicked.connect(lambda: self._toggle_macros(not self.ui.macro_table.isVisible()))
         self.ui.add_macro.clicked.connect(lambda _: self.ui.macro_table.add_row())
         return
@@ -135,6 +184,7 @@ class MainWindow(QMainWindow):
             "Ctrl+R":       self._copy_text,
             "Ctrl+P":       self._paste_text,
             "Ctrl+Q":       self._quick_translate,
+            "Ctrl+Shift+Q": lambda: self.ui.clipboard_watch.toggle(),
             "Ctrl+B":       lambda: self.ui.panel_toggle.toggle(), # activates the toggled Signal
             "Alt+Z":        lambda: self.ui.settings_button.setFocus(),
             "Ctrl+,":       lambda: self._change_panel(self.ui.settings_panel),
@@ -142,43 +192,94 @@ class MainWindow(QMainWindow):
             "Ctrl+1":       lambda: self.ui.default_button.setChecked(True),
             "Ctrl+2":       lambda: self.ui.cas_button.setChecked(True),
             "Ctrl+3":       lambda: self.ui.sc_button.setChecked(True),
-            "Ctrl+H":       lambda: self._change_panel(self.ui.history_panel),
-            "Ctrl+T":       lambda: self._change_panel(self.ui.theme_panel),
+            "Ctrl+H":       lambda: self._change_panel(self._history_panel()),
+            "Ctrl+T":       lambda: self._change_panel(self._theme_panel()),
             "Ctrl+Shift+T": self._copy_picker_color,
-            "Ctrl+Shift+D": lambda: self.ui.dark.setChecked(True),
-            "Ctrl+Shift+L": lambda: self.ui.light.setChecked(True),
+            "Ctrl+Shift+D": lambda: self._choose_theme_mode("dark"),
+            "Ctrl+Shift+L": lambda: self._choose_theme_mode("light"),
             "Ctrl+K":       lambda: self.ui.constants.setChecked(not self.ui.constants.isChecked()),
             "Ctrl+G":       lambda: self.ui.g.setChecked(not self.ui.g.isChecked()),
             "Ctrl+E":       lambda: self.ui.e.setChecked(not self.ui.e.isChecked()),
             "Ctrl+I":       lambda: self.ui.i.setChecked(not self.ui.i.isChecked())
         }
 
+        if stage_timer.recorder is not None:
+            # Hidden, only there when KALIUM_TIMINGS is set
+            key_map["Ctrl+Shift+F12"] = lambda: self._open_sub_window(TimingsWindow, recorder=stage_timer.recorder)
+        if self.stall_monitor is not None:
+            # Hidden, only there when KALIUM_STALL_MONITOR is set
+            key_map["Ctrl+Shift+F11"] = self._export_stalls
+
         for (key, connection) in key_map.items():
             QShortcut(QKeySequence(key), self).activated.connect(connection)
         return
 
     def _copy_picker_color(self) -> None:
+        if self.ui.theme_panel is None: return
         return self.clipboard.setText(self.ui.color_line.text())
 
     def _choose_theme_mode(self, mode: str):
         if self.ui.mode == mode: return
+        self.ui.load_style(mode)
+        # Otherwise the theme panel is built with the current mode
+        if self.ui.theme_panel is None: return
+
         match mode:
             case "dark" | "light":
                 self.ui.color_form.lock_boxes(True)
+                # Keeps the radio buttons in sync when changed by a shortcut
+                self.ui.dark.blockSignals(True)
+                self.ui.light.blockSignals(True)
+                getattr(self.ui, mode).setChecked(True)
+                self.ui.dark.blockSignals(False)
+                self.ui.light.blockSignals(False)
             case "custom":
                 self.ui.color_form.lock_boxes(False)
         
-        self.ui.load_style(mode)
         self.ui.color_form.set_box_colors([QColor(color) for color in self.ui.theme_manager.get_section(mode).values()])
         return
 
+    def _preview_theme_color(self, placeholder: str, color: QColor):
+        # Only custom colors are edited, dark and light refill the boxes
+        if self.ui.mode == "custom":
+            self.ui.preview_color(placeholder, color.name())
+        return
+
+    def _history_panel(self) -> QWidget:
+        """The history panel, built and loaded the first time it is shown"""
+        if self.ui.history_panel is None:
+            self.ui.build_history_panel()
+            self.ui.history_scroll.set_store(self.history_store)
+            self._setup_history_signals()
+        return self.ui.history_panel
+
+    def _theme_panel(self) -> QWidget:
+        """The theme panel, built the first time it is shown"""
+        if self.ui.theme_panel is None:
+            self.ui.build_theme_panel()
+            self._setup_theme_signals()
+        return self.ui.theme_panel
+
     def _copy_text(self):
         _in = self.ui.i_text_edit.toPlainText()
         _out = self.ui.o_text_edit.toPlainText()
         self.clipboard.setText(_out)
         if _out:
-            self.history_manager.append([_in, _out])
-            self.ui.history_scroll.append(_in, _out)
+            self._record_history(_in, _out)
+        return
+
+    def _record_history(self, latex: str, translation: str):
+        # Written to the history store right away
+        if self.ui.history_panel is None:
+            self.history_store.append(latex, translation)
+        else:
+            self.ui.history_scroll.append(latex, translation)
+        return
+
+    def _toggle_clipboard_watch(self, on: bool):
+        self.clipboard_watcher.set_active(on)
+        section = self.settings_manager.get_section("settings")
+        self.settings_manager.set_section("settings", {**section, "clipboard_watch": on})
         return
     
     def _paste_text(self):
@@ -187,12 +288,44 @@ class MainWindow(QMainWindow):
 
     def _quick_translate(self):
         self._paste_text()
+        # The pasted text must be translated before it can be copied
+        self.block_translator.translate_all(wait=True)
         self._copy_text()
         return
 
-    def _start_translation(self):
-        translation = translate(
-            self.ui.i_text_edit.toPlainText(),
+    def _export_stalls(self):
+        path = exe_dir_path(time.strftime("data/stalls-%Y%m%d-%H%M%S.json"))
+        self.stall_monitor.export(path)
+        print(f"Kalium: event loop stalls written to {path}", file=sys.stderr)
+        return
+
+    def _raise_window(self):
+        if self.isMinimized():
+            self.showNormal()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+        return
+
+    def _quick_translate_command(self) -> str:
+        self._quick_translate()
+        return self.ui.o_text_edit.toPlainText()
+
+    def _translate_command(self, text: str, mode: str | None = None) -> str:
+        """Translate line by line like the output edit, without touching the window"""
+        macros, flags = self._translation_options()
+        if mode is not None:
+            flags.update(TI_on=mode == "cas", SC_on=mode == "speedcrunch")
+        return "\n".join(self.translation_cache.translate(line, macros, flags) for line in text.split("\n"))
+
+    def _compile_macros(self, data: list):
+        sequential = self.settings_manager.get_section("settings").get("sequential_macros", False)
+        self.macro_replacer = MacroReplacer.from_table(data, sequential)
+        return
+
+    def _translation_options(self) -> tuple:
+        """Snapshot of the translation input, safe to pass to another thread"""
+        flags = dict(
             TI_on=self.ui.cas_button.isChecked(),
             SC_on=self.ui.sc_button.isChecked(),
             constants_on=self.ui.constants.isChecked(),
@@ -200,34 +333,75 @@ class MainWindow(QMainWindow):
             i_on=self.ui.i.isChecked(),
             e_on=self.ui.e.isChecked()
         )
-        
-        for macro in self.ui.macro_table.get_data():
-            if macro[2] and macro[0] != "":
-                translation = translation.replace(macro[0], macro[1])
-        self.ui.o_text_edit.setPlainText(translation)
-        self._start_animation(self._animate_progressbar)
+        return (self.macro_replacer, flags)
+
+    def _start_translation(self):
+        self.block_translator.translate_all()
         return
 
     def _on_translation_mode_changed(self, btn, on):
         if on:
             self.translation_mode = btn.property("mode")
+            self.settings_manager.set_property("settings", "mode", self.translation_mode)
             self._start_translation()
         return
+
+    def _store_legacy_flags(self):
+        s_manager = self.settings_manager
+        s_manager.set_property("legacy", "g", self.ui.g.isChecked())
+        s_manager.set_property("legacy", "e", self.ui.e.isChecked())
+        s_manager.set_property("legacy", "i", self.ui.i.isChecked())
+        s_manager.set_property("legacy", "constants", self.ui.constants.isChecked())
+        return
     
     def _update_macro_table(self, backup):
-        self.macro_manager.update()
+        # False when the file watcher has loaded the saved file already
+        if not self.macro_manager.update():
+            return
         try:
-            self.ui.macro_table.set_data(self.macro_manager.data)
+            self._show_macros(self.macro_manager.data)
         except Exception:
-            self.ui.macro_table.set_data(backup)
+            self._show_macros(backup)
             new_error_box(self, "Invalid JSON structure. Changes not saved.")
         return
 
+    def _store_macros(self, data):
+        # Saving a reload would rewrite the file that was just edited
+        if not self._reloading_macros:
+            self.macro_manager.set_data(data)
+        return
+
+    def _reload_macro_table(self, data):
+        """Called when macros.json was changed outside Kalium"""
+        previous = [list(row) for row in self.ui.macro_table.get_data()]
+        try:
+            self._show_macros(data)
+        except Exception:
+            # Back to the last good macros, the file is left as it is
+            self._show_macros(previous)
+            self.macro_manager.data = previous
+            new_error_box(self, "Invalid JSON structure in macros.json. Changes not loaded.")
+        return
+
+    def _show_macros(self, data):
+        """Fill the macro table with data read from macros.json, without saving it back"""
+        self._reloading_macros = True
+        try:
+            self.ui.macro_table.set_data(data)
+        finally:
+            self._reloading_macros = False
+        return
+
+    def _macro_file_error(self, error):
+        new_error_box(self, f"macros.json is not valid JSON, the previous macros are kept.\n{error}")
+        return
+
     def _toggle_macros(self, show: bool):
         self.ui.show_macros_button.setText("✕") if show else self.ui.show_macros_button.setText("☰")
         self.ui.macro_table.setVisible(show)
         self.ui.add_macro.setVisible(show)
         self.ui.open_macros_btn.setVisible(show)
+        self.settings_manager.set_property("toggles", "macros", show)
         return
 
     def _toggle_legacy_controls(self, show: bool):
@@ -236,6 +410,7 @@ class MainWindow(QMainWindow):
         self.ui.g.setVisible(show)
         self.ui.e.setVisible(show)
         self.ui.i.setVisible(show)
+        self.settings_manager.set_property("toggles", "legacy", show)
         return
 
     def _load_data(self):
@@ -256,6 +431,7 @@ class MainWindow(QMainWindow):
             if btn.property("mode") == self.translation_mode:
                 btn.setChecked(True)
 
+        self.ui.clipboard_watch.setChecked(self.settings_manager.get_section("settings").get("clipboard_watch", False))
         self._toggle_legacy_controls(self.settings_manager.get_property("toggles", "legacy"))
         self._toggle_macros(self.settings_manager.get_property("toggles", "macros"))
         
@@ -264,34 +440,23 @@ class MainWindow(QMainWindow):
         self.ui.e.setChecked(self.settings_manager.get_property("legacy", "e"))
         self.ui.i.setChecked(self.settings_manager.get_property("legacy", "i"))
 
-        self.ui.history_scroll.append_list(self.history_manager.data)
-        self.ui.macro_table.set_data(self.macro_manager.data)
+        self._show_macros(self.macro_manager.data)
         return
 
     def _save_data(self):
         self.ui.save_colors()
-        self.history_manager.set_data(self.ui.history_scroll.get_history_data())
-        
+
         s_manager = self.settings_manager
         geo = self.normalGeometry()
 
         s_manager.set_property("window", "position", [geo.x(), geo.y()])
         s_manager.set_property("window", "dimensions", [geo.width(), geo.height()])
         s_manager.set_property("window", "split", self.ui.splitter.sizes())
-        
-        s_manager.set_property("settings", "mode", self.translation_mode)
-
-        s_manager.set_property("toggles", "macros", self.ui.macro_table.isVisible())
-        s_manager.set_property("toggles", "legacy", self.ui.g.isVisible())
 
-        s_manager.set_property("legacy", "g", self.ui.g.isChecked())
-        s_manager.set_property("legacy", "e", self.ui.e.isChecked())
-        s_manager.set_property("legacy", "i", self.ui.i.isChecked())
-        s_manager.set_property("legacy", "constants", self.ui.constants.isChecked())
-
-        s_manager.save_data()
-        self.history_manager.save_data()
-        self.macro_manager.save_data()
+        # Mode, toggles and legacy flags were stored as they changed,
+        # write whatever the save timers have not written yet
+        s_manager.flush()
+        self.macro_manager.flush()
         return
 
     def _toggle_panel(self, show: bool):
@@ -352,18 +517,6 @@ class MainWindow(QMainWindow):
         toggle.setText(text)
         toggle.blockSignals(False)
 
-    def _start_animation(self, animation: "function"):
-        loop = asyncio.get_event_loop()
-
-        for task in self.async_tasks:
-            if not task.done():
-                task.cancel()
-            self.async_tasks.remove(task)
-
-        new_task = loop.create_task(animation())
-        self.async_tasks.append(new_task)
-        return 
-
     def _open_sub_window(self, sub_type: AboutWindow | InfoWindow | EditorWindow, *args, **kwargs):
         self.sub: QWidget = sub_type(self, *args, **kwargs)
         
@@ -373,32 +526,6 @@ class MainWindow(QMainWindow):
             self.sub.show()
         return
 
-    async def _animate_progressbar(self):
-        try:
-            end = 100
-            degree = 4
-            denominator = end ** (degree - 1)
-
-            ease = lambda t: int(t ** degree / denominator)
-
-            for t in range(101):
-                self.ui.progressbar.setValue(ease(t))
-                await asyncio.sleep(0.003)
-    
-            self.ui.progressbar.setLayoutDirection(Qt.RightToLeft)
-
-            for t in range(100, -1, -1):
-                self.ui.progressbar.setValue(ease(t))
-                await asyncio.sleep(0.002)
-
-            self.ui.progressbar.setValue(0)
-            self.ui.progressbar.setLayoutDirection(Qt.LeftToRight)
-            
-        except asyncio.CancelledError:
-            self.ui.progressbar.setValue(0)
-            self.ui.progressbar.setLayoutDirection(Qt.LeftToRight)
-            raise
-
     def tab_event(self, window_widget, event: QEvent):
         if event.key() == Qt.Key_Tab:
             self.focusNextChild()
@@ -431,7 +558,13 @@ class MainWindow(QMainWindow):
 
 # Overrides
     def closeEvent(self, event):
+        self.instance_server.close()
+        if self.stall_monitor is not None:
+            self.stall_monitor.stop()
+            self._export_stalls()
+        self.block_translator.shutdown()
         self._save_data()
+        self.history_store.close()
         event.accept()
 
     def eventFilter(self, source, event) -> bool:
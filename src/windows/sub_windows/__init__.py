@@ -1,3 +1,4 @@
 from .about_window import AboutWindow
 from .info_window import InfoWindow
-from .editor_window import EditorWindow
\ No newline at end of file
+from .editor_window import EditorWindow
+from .timings_window import TimingsWindow
\ No newline at end of file
@@ -7,6 +7,7 @@ from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QSizePolicy
 from PySide6.QtWidgets import QDialog, QMessageBox
 
 from utils.json_editor import JSONEditor
+from utils.json_validator import JSONValidator
 from widgets.message_boxes import new_message_box, new_error_box
 
 class EditorWindow(QDialog):
@@ -22,6 +23,9 @@ class EditorWindow(QDialog):
         self.setMinimumSize(300, 300)
         self.setWindowFlags(Qt.Dialog | Qt.WindowCloseButtonHint | Qt.WindowMaximizeButtonHint)
         self._init_ui()
+        self.saved_revision = self.editor.document().revision()
+        self.validator = JSONValidator(self.editor.document(), parent=self)
+        self.validator.validated.connect(self._validated)
         self.editor.textChanged.connect(self._editor_text_changed)
         self.setFocus()
 
@@ -70,13 +74,21 @@ class EditorWindow(QDialog):
             return (False, error_msg)
 
     def _editor_text_changed(self):
-        self.saved = False
+        # Also emitted for highlighting, which leaves the revision alone
+        self.saved = self.editor.document().revision() == self.saved_revision
+
+    def _validated(self, error):
+        if error is None:
+            self.editor.set_error(-1)
+            return
+        line, column, message = error
+        self.editor.set_error(line - 1, f"{message}: line {line} column {column}")
 
     def load_json(self, file_path):
         self.file_path = file_path
-        with open(file_path, 'r') as file:
-            self.backup = json.load(file)
         self.editor.load_json(file_path)
+        # Already parsed by the editor, which replaces rather than mutates it on save
+        self.backup = self.editor.json_manager.get_data()
         self.label.setText("Currently editing: <b>" + os.path.basename(file_path) + "</b>")
 
     def _save(self) -> bool:
@@ -84,6 +96,7 @@ class EditorWindow(QDialog):
         if valid:
             self.editor.save_json()
             self.saved = True
+            self.saved_revision = self.editor.document().revision()
             self.fileSaved.emit()
             return True
         else:
@@ -108,9 +121,16 @@ class EditorWindow(QDialog):
         else:
             return
 
+    def done(self, result):
+        # accept() and reject() both end here, the worker process must not outlive the dialog
+        self.validator.shutdown()
+        super().done(result)
+
     def closeEvent(self, event):
         self._close_pressed()
         event.ignore() # if canceled 
 
     def reject(self):
-        return
\ No newline at end of file
+        # Esc asks about unsaved changes like the Close button
+        self._close_pressed()
+        return
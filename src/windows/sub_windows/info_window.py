@@ -42,6 +42,7 @@ class InfoWindow(QDialog):
             ("Ctrl + R  /  Ctrl + Shift + C", "Copy result"),
             ("Ctrl + P", "Paste clipboard text"),
             ("Ctrl + Q", "Quick translate"),
+            ("Ctrl + Shift + Q", "Translate copied LaTeX on / off"),
             ("Ctrl + B", "Toggle tab on / off"),
             ("Alt + Z", "Focus / unfocus tab bar"),
             ("Ctrl + ,  /  Ctrl + O", "Open settings tab"),
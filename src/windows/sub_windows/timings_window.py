@@ -0,0 +1,108 @@
+import time
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QLabel, QPushButton
+from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout
+from PySide6.QtWidgets import QDialog
+
+from PySide6.QtWidgets import QTableView, QHeaderView
+from PySide6.QtGui import QStandardItemModel, QStandardItem
+
+from utils.stage_timer import StageRecorder, STAGES
+from utils.resource_helpers import exe_dir_path
+
+class TimingsWindow(QDialog):
+    """Debug window for the stage timings, opened with Ctrl+Shift+F12 when KALIUM_TIMINGS is set"""
+    # Most recent runs shown in the table, the dump contains the whole buffer
+    shown_runs = 200
+
+    def __init__(self, parent=None, recorder: StageRecorder = None):
+        super().__init__(parent)
+        self.recorder = recorder
+
+        self.setWindowTitle("Translation timings")
+        self.setGeometry(400, 50, 600, 600)
+        self.setMinimumSize(300, 300)
+        self.setWindowFlags(Qt.Dialog | Qt.WindowCloseButtonHint)
+
+        self._init_ui()
+        self.refresh()
+
+    def _init_ui(self):
+        self.setProperty("class", "window")
+
+        self.summary_model = QStandardItemModel()
+        self.summary_model.setHorizontalHeaderLabels(["Stage", "Mean ms", "Median ms", "Max ms"])
+        self.summary_view = self._table(self.summary_model)
+
+        self.runs_model = QStandardItemModel()
+        self.runs_model.setHorizontalHeaderLabels(["Kind", "Lines", "Hits", *STAGES])
+        self.runs_view = self._table(self.runs_model)
+
+        self.status = QLabel()
+
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self._clear)
+        dump_button = QPushButton("Dump to file")
+        dump_button.clicked.connect(self._dump)
+        close_button = QPushButton("Close")
+        close_button.setAutoDefault(True)
+        close_button.clicked.connect(self.close)
+
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(refresh_button)
+        button_layout.addWidget(clear_button)
+        button_layout.addWidget(dump_button)
+        button_layout.addStretch()
+        button_layout.addWidget(close_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel("<h3>Per stage</h3>"))
+        layout.addWidget(self.summary_view, 1)
+        layout.addWidget(QLabel(f"<h3>Last {self.shown_runs} runs (ms)</h3>"))
+        layout.addWidget(self.runs_view, 3)
+        layout.addWidget(self.status)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def _table(self, model: QStandardItemModel) -> QTableView:
+        view = QTableView()
+        view.setModel(model)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        view.verticalHeader().setVisible(False)
+        view.setEditTriggers(QTableView.NoEditTriggers)
+        return view
+
+    def refresh(self):
+        self.summary_model.removeRows(0, self.summary_model.rowCount())
+        for stage, values in self.recorder.summary().items():
+            self.summary_model.appendRow([QStandardItem(stage)] + [
+                QStandardItem(f"{values[key]:.3f}") for key in ("mean", "median", "max")
+            ])
+
+        runs = self.recorder.snapshot()
+        self.runs_model.removeRows(0, self.runs_model.rowCount())
+        for run in reversed(runs[-self.shown_runs:]):
+            self.runs_model.appendRow(
+                [QStandardItem(run["kind"]), QStandardItem(str(run["lines"])), QStandardItem(str(run["cache_hits"]))]
+                + [QStandardItem(f"{run['stages'][stage] * 1e3:.3f}") for stage in STAGES]
+            )
+        self.status.setText(f"{len(runs)} runs recorded")
+        return
+
+    def _clear(self):
+        self.recorder.clear()
+        self.refresh()
+        return
+
+    def _dump(self):
+        path = exe_dir_path(time.strftime("data/timings-%Y%m%d-%H%M%S.json"))
+        try:
+            self.recorder.dump(path)
+        except OSError as e:
+            self.status.setText(f"Could not write {path}: {e}")
+        else:
+            self.status.setText(f"Written to {path}")
+        return
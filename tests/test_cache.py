@@ -0,0 +1,45 @@
+from engine import TranslationCache, translate
+from engine.macros import MacroReplacer
+
+NO_MACROS = MacroReplacer()
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TranslationCache(maxsize=2)
+    cache.translate("a", NO_MACROS, {})
+    cache.translate("b", NO_MACROS, {})
+    # Used, so b is now the oldest
+    assert cache.get("a", NO_MACROS, {}) == "a"
+    cache.translate("c", NO_MACROS, {})
+    assert cache.get("b", NO_MACROS, {}) is None
+    assert cache.get("a", NO_MACROS, {}) == "a"
+    assert cache.get("c", NO_MACROS, {}) == "c"
+    assert cache.stats()["size"] == 2
+
+def test_flags_are_part_of_the_key():
+    cache = TranslationCache()
+    latex = r"\sqrt{x}"
+    assert cache.translate(latex, NO_MACROS, {}) == translate(latex)
+    assert cache.translate(latex, NO_MACROS, {"SC_on": True}) == translate(latex, SC_on=True)
+    assert cache.get(latex, NO_MACROS, {"TI_on": True}) is None
+    # Unset and False flags are the same key
+    assert cache.get(latex, NO_MACROS, {"SC_on": False}) == translate(latex)
+
+def test_new_macros_are_not_served_stale_translations():
+    cache = TranslationCache()
+    macros = MacroReplacer([("x", "y")])
+    assert cache.translate("x", macros, {}) == "y"
+    # Compiled again after an edit to the table, with a new version
+    rebuilt = MacroReplacer([("x", "z")])
+    assert cache.get("x", rebuilt, {}) is None
+    assert cache.translate("x", rebuilt, {}) == "z"
+    assert cache.translate("x", macros, {}) == "y"
+
+def test_hit_and_miss_counters():
+    cache = TranslationCache()
+    for latex in ["a", "b", "a", "a", "c"]:
+        cache.translate(latex, NO_MACROS, {})
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 3)
+    assert stats["hit_rate"] == 2 / 5
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 512, "hits": 0, "misses": 0, "hit_rate": 0.0}
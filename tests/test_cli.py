@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINES = [r"\log_{2} 8", r"2\pi r", r"\frac{a}{b}"]
+
+def kalium(*args, stdin=""):
+    return subprocess.run(
+        [sys.executable, os.path.join(ROOT, "src", "main.py"), *args],
+        input=stdin, capture_output=True, text=True, encoding="utf-8", timeout=120,
+    )
+
+@pytest.mark.parametrize("mode, expected", [
+    ("default", ["log₂(8)", "2πr", "(a/b)"]),
+    ("cas", ["log(8,2)", "2*π*r", "(a/b)"]),
+    ("speedcrunch", ["log(2; 8)", "2*pi*r", "(a/b)"]),
+])
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_translate_modes(mode, expected, jobs):
+    result = kalium("translate", "--mode", mode, "-j", jobs, stdin="\n".join(LINES) + "\n")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == expected
+
+def test_translate_jsonl():
+    result = kalium("translate", "-f", "jsonl", "-j", "1", stdin='"2\\\\pi r"\n\n{"latex": "x", "id": 1}\n[1]\n')
+    assert result.returncode == 0, result.stderr
+    lines = result.stdout.splitlines()
+    assert lines[:2] == ['{"latex": "2\\\\pi r", "translation": "2πr"}', '{"latex": "x", "id": 1, "translation": "x"}']
+    assert '"error"' in lines[2]
+
+def test_translate_bad_arguments():
+    assert kalium("translate", "--mode", "nope").returncode == 2
+    result = kalium("translate", os.path.join(ROOT, "missing.txt"))
+    assert result.returncode == 2
+    assert "Input file not found" in result.stderr
+
+@pytest.mark.parametrize("data, expected", [
+    (b'{"ok": true, "result": "x"}\n', {"ok": True, "result": "x"}),
+    (b"", {"ok": False, "error": "No response from the running instance"}),
+    (b'{"ok": true, "res', {"ok": False, "error": "Invalid response from the running instance"}),
+    (b"\xff\xfe\n", {"ok": False, "error": "Invalid response from the running instance"}),
+    (b"[1]\n", {"ok": False, "error": "Invalid response from the running instance"}),
+])
+def test_send_reply_parsing(data, expected):
+    pytest.importorskip("PySide6.QtNetwork")
+    from utils.single_instance import parse_response
+    assert parse_response(data) == expected
@@ -0,0 +1,87 @@
+import pytest
+
+from engine import translate
+from engine.macros import MacroReplacer
+from engine.parser import parse
+from engine.tokenizer import tokenize
+
+CAS = {"TI_on": True, "constants_on": True}
+SC = {"SC_on": True}
+
+@pytest.mark.parametrize("latex, flags, expected", [
+    (r"\log_{2} 8", {}, "log₂(8)"),
+    (r"\log_b x", {}, "log_b(x)"),
+    (r"\log_{10}^{2} x", {}, "log₁₀(x)^2"),
+    (r"\log_{2} 8", CAS, "log(8,2)"),
+    (r"\log_{2} 8", SC, "log(2; 8)"),
+])
+def test_function_subscript_stays_on_the_name(latex, flags, expected):
+    assert translate(latex, **flags) == expected
+
+@pytest.mark.parametrize("latex, flags, expected", [
+    (r"2\pi r", SC, "2*pi*r"),
+    (r"E=mc^2", CAS, "E=m*_c^2"),
+    (r"\sin x \cos x", SC, "sin(x)*cos(x)"),
+    (r"\sin 2x", CAS, "sin(2*x)"),
+    (r"2\pi r", {}, "2πr"),
+    # Digit groups, postfix symbols and units stay as they are
+    (r"1\,000", SC, "1000"),
+    (r"90\degree", CAS, "90°"),
+    (r"4.19\,\text{kJ}", CAS, "4.19_kJ"),
+])
+def test_juxtaposed_operands(latex, flags, expected):
+    assert translate(latex, **flags) == expected
+
+@pytest.mark.parametrize("latex", [
+    "{" * 1000 + "x" + "}" * 1000,
+    r"\frac{" * 300 + "1" + "}{2}" * 300,
+    "x^{" * 300 + "2" + "}" * 300,
+])
+def test_deep_nesting_does_not_raise(latex):
+    assert translate(latex) == latex
+    assert translate(latex, **SC) == latex
+
+def test_parser_returns_deep_nesting_verbatim():
+    latex = "{" * 1000 + "x"
+    nodes = parse(tokenize(latex))
+    assert len(nodes) == 1 and nodes[0].text == latex
+
+def _legacy_macros(text, rows):
+    # How the main window applied macros before MacroReplacer
+    for macro in rows:
+        if macro[2] and macro[0] != "":
+            text = text.replace(macro[0], macro[1])
+    return text
+
+@pytest.mark.parametrize("macros, text, expected", [
+    # The longest macro starting at a position wins, whatever the row order
+    ([("ab", "1"), ("abc", "2")], "abcab", "21"),
+    ([("abc", "2"), ("ab", "1")], "abcab", "21"),
+    ([("a", "1"), ("ab", "2"), ("abcd", "3")], "abcabcdaab", "2c312"),
+    # Leftmost match first, overlapping ones after it are not seen
+    ([("ab", "1"), ("bc", "2")], "abc", "1c"),
+    # Replacements are not matched again
+    ([("a", "b"), ("b", "c")], "ab", "bc"),
+    # The earlier of two rows with the same source wins
+    ([("x", "1"), ("x", "2")], "x", "1"),
+])
+def test_macros_replace_leftmost_longest(macros, text, expected):
+    assert MacroReplacer(macros).apply(text) == expected
+
+@pytest.mark.parametrize("source", [".", "a*", "(x)", "[1]", "\\", "^$", "a|b", "?+{2}"])
+def test_macro_sources_are_literal(source):
+    replacer = MacroReplacer([(source, "#")])
+    assert replacer.apply(f"<{source}>") == "<#>"
+    assert replacer.apply("ab xaa 1 x") == "ab xaa 1 x"
+
+def test_empty_macro_table():
+    replacer = MacroReplacer.from_table([["", "x", True], ["a", "b", False]])
+    assert not replacer
+    assert replacer.apply("a") == "a"
+    assert MacroReplacer().apply("") == ""
+
+@pytest.mark.parametrize("text", ["abcab", "a*b", "ab", "mu_0 * c^2", ""])
+def test_sequential_macros_match_the_legacy_loop(text):
+    rows = [["a", "b", True], ["b", "c", True], ["ab", "x", True], ["*", "·", True], ["c", "z", False], ["", "y", True]]
+    replacer = MacroReplacer.from_table(rows, sequential=True)
+    assert replacer.apply(text) == _legacy_macros(text, rows)
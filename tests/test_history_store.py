@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from utils.history_store import HistoryStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+def _fill(store, count):
+    store.extend([(f"x^{i}", f"x^{i} = {i}") for i in range(count)])
+    return
+
+def test_old_history_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "history.json"
+    legacy.write_text(json.dumps([["a", "1"], ["b", "2"], "broken", ["c", "3", "extra"]]), encoding="utf-8")
+    store = HistoryStore(str(tmp_path / "history.db"), str(legacy))
+    assert [row[1:] for row in store.page()] == [("c", "3"), ("b", "2"), ("a", "1")]
+    store.close()
+    # Only when the database is created
+    store = HistoryStore(str(tmp_path / "history.db"), str(legacy))
+    assert store.count() == 3
+    store.close()
+
+def test_unreadable_history_json_is_skipped(tmp_path):
+    legacy = tmp_path / "history.json"
+    legacy.write_text("[[", encoding="utf-8")
+    store = HistoryStore(str(tmp_path / "history.db"), str(legacy))
+    assert store.count() == 0
+    store.close()
+
+def test_pages_are_newest_first(store):
+    _fill(store, 25)
+    first = store.page(limit=10)
+    assert [row[1] for row in first] == [f"x^{i}" for i in range(24, 14, -1)]
+    second = store.page(first[-1][0], limit=10)
+    assert [row[1] for row in second] == [f"x^{i}" for i in range(14, 4, -1)]
+    last = store.page(second[-1][0], limit=10)
+    assert [row[1] for row in last] == [f"x^{i}" for i in range(4, -1, -1)]
+    assert store.page(last[-1][0], limit=10) == []
+
+def test_append_returns_the_id(store):
+    _fill(store, 2)
+    entry_id = store.append("y", "y")
+    assert store.page(limit=1) == [(entry_id, "y", "y")]
+    assert store.page(entry_id, limit=1)[0][0] < entry_id
+
+def test_delete_and_clear(store):
+    _fill(store, 5)
+    rows = store.page()
+    store.delete(rows[1][0])
+    assert store.page() == rows[:1] + rows[2:]
+    assert store.count() == 4
+    store.clear()
+    assert store.count() == 0 and store.page() == []
+    # Ids are not reused after a clear
+    assert store.append("z", "z") > rows[0][0]
+
+# Search
+
+ENTRIES = [(r"\alpha + 1", "α+1"), (r"\mu_0 I", "μ_0*I"), (r"\frac{1}{2}", "1/2"), (r"\ALPHA", "A"), ("50%", "0.5")]
+
+@pytest.fixture(params=["fts", "like"])
+def searchable(request, store):
+    if request.param == "like":
+        # As on SQLite builds without FTS5
+        store.fts = False
+    else:
+        assert store.fts
+    store.extend(ENTRIES)
+    return store
+
+@pytest.mark.parametrize("text, expected", [
+    ("", ""),
+    ("  a ", ""),
+    ("mu", ""),
+    ("  mu_", "mu_"),
+    ("alpha", "alpha"),
+])
+def test_short_queries_are_not_searched(text, expected):
+    assert HistoryStore.search_query(text) == expected
+
+@pytest.mark.parametrize("query, expected", [
+    ("alpha", [r"\ALPHA", r"\alpha + 1"]),
+    ("mu_0", [r"\mu_0 I"]),
+    ("μ_0*", [r"\mu_0 I"]),
+    ("{1}{", [r"\frac{1}{2}"]),
+    ("50%", ["50%"]),
+    ('"x"', []),
+    ("beta", []),
+])
+def test_search_finds_substrings_newest_first(searchable, query, expected):
+    assert [row[1] for row in searchable.search(query)] == expected
+
+def test_search_pages(searchable):
+    first = searchable.search("lph", limit=1)
+    assert [row[1] for row in first] == [r"\ALPHA"]
+    assert [row[1] for row in searchable.search("lph", first[0][0], limit=1)] == [r"\alpha + 1"]
+
+def test_deleted_entries_are_not_found(searchable):
+    entry_id = searchable.search("mu_0")[0][0]
+    searchable.delete(entry_id)
+    assert searchable.search("mu_0") == []
@@ -0,0 +1,123 @@
+import json
+import os
+
+import pytest
+
+from utils.json_manager import JSONManager
+
+MACROS = [["\\alpha", "α", True], ["\\beta", "β", False]]
+
+@pytest.fixture
+def macros_path(tmp_path):
+    path = tmp_path / "macros.json"
+    path.write_text(json.dumps(MACROS), encoding="utf-8")
+    return str(path)
+
+def test_showing_reloaded_data_does_not_schedule_a_write(macros_path):
+    manager = JSONManager(macros_path)
+    with open(macros_path, "w", encoding="utf-8") as file:
+        json.dump(MACROS[:1], file)
+    assert manager.update()
+    # The macro table hands back an equal copy of what it was given
+    manager.set_data([list(row) for row in manager.data])
+    assert not manager.dirty
+    assert manager._timer is None
+
+def test_changed_in_place_data_is_saved(macros_path):
+    manager = JSONManager(macros_path)
+    manager.data[0][2] = False
+    manager.set_data(manager.data)
+    assert manager.dirty
+    manager.flush()
+
+# Write-behind
+
+@pytest.fixture
+def manager(macros_path, monkeypatch):
+    monkeypatch.setattr(JSONManager, "save_delay", 0.05)
+    manager = JSONManager(macros_path)
+    yield manager
+    manager.flush()
+
+def _read(path):
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+def test_changes_are_written_once_after_the_delay(manager, macros_path, monkeypatch):
+    writes = []
+    write = manager._write_atomic
+    monkeypatch.setattr(manager, "_write_atomic", lambda text: (writes.append(text), write(text)))
+    for i in range(5):
+        manager.set_data(MACROS[:1] * (i + 1))
+    assert _read(macros_path) == MACROS
+    manager._timer.join(1)
+    assert len(writes) == 1
+    assert _read(macros_path) == MACROS[:1] * 5
+    assert not manager.dirty
+
+def test_flush_writes_right_away(manager, macros_path):
+    manager.set_data(MACROS[:1])
+    manager.flush()
+    assert _read(macros_path) == MACROS[:1]
+    assert manager._timer is None and not manager.dirty
+
+def test_failed_write_leaves_the_file_whole(manager, macros_path, tmp_path, monkeypatch):
+    def fail(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, "fsync", fail)
+    manager.set_data(MACROS[:1])
+    with pytest.raises(OSError):
+        manager.flush()
+    assert _read(macros_path) == MACROS
+    assert os.listdir(tmp_path) == ["macros.json"]
+    # Kept as unsaved, so the next flush writes it
+    assert manager.dirty
+    monkeypatch.setattr(os, "fsync", lambda fd: None)
+    manager.flush()
+    assert _read(macros_path) == MACROS[:1]
+    assert os.listdir(tmp_path) == ["macros.json"]
+
+# Reloading
+
+def _write_raw(path, text, mtime_ns=None):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+def test_unchanged_file_is_not_reloaded(macros_path):
+    manager = JSONManager(macros_path)
+    data = manager.data
+    assert not manager.update()
+    # Rewritten with the same bytes
+    _write_raw(macros_path, json.dumps(MACROS))
+    assert not manager.update()
+    assert manager.data is data
+
+def test_edited_file_is_reloaded(macros_path):
+    manager = JSONManager(macros_path)
+    _write_raw(macros_path, json.dumps(MACROS[:1]))
+    assert manager.update()
+    assert manager.data == MACROS[:1]
+
+def test_edit_keeping_size_and_mtime_is_reloaded(macros_path):
+    manager = JSONManager(macros_path)
+    mtime = os.stat(macros_path).st_mtime_ns
+    # Same length, written within the mtime resolution of the last read
+    edited = [["\\alpha", "β", True], ["\\beta", "α", False]]
+    _write_raw(macros_path, json.dumps(edited), mtime)
+    assert manager.update()
+    assert manager.data == edited
+
+def test_corrupt_file_keeps_the_previous_data(macros_path):
+    manager = JSONManager(macros_path)
+    manager.set_data(MACROS[:1])
+    _write_raw(macros_path, '[["\\\\alpha", "α", tr')
+    with pytest.raises(ValueError):
+        manager.update()
+    assert manager.data == MACROS[:1]
+    # The pending save is kept too
+    assert manager.dirty and manager._timer is not None
+    _write_raw(macros_path, json.dumps(MACROS[1:]))
+    assert manager.update()
+    assert manager.data == MACROS[1:] and not manager.dirty
@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip("PySide6.QtCore")
+
+from utils import stall_monitor
+
+@pytest.mark.parametrize("value, expected", [
+    (None, 100.0),
+    ("", 100.0),
+    ("250", 250.0),
+    ("12.5", 12.5),
+    ("abc", 100.0),
+    ("-5", 100.0),
+    ("nan", 100.0),
+    ("inf", 100.0),
+])
+def test_threshold_from_environment(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("KALIUM_STALL_MS", raising=False)
+    else:
+        monkeypatch.setenv("KALIUM_STALL_MS", value)
+    assert stall_monitor.threshold_ms() == expected
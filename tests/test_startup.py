@@ -0,0 +1,17 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_first_paint_within_budget():
+    pytest.importorskip("PySide6")
+    # Budget from KALIUM_STARTUP_BUDGET_MS, as for the script itself
+    result = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "benchmarks", "startup.py")],
+        capture_output=True, text=True, timeout=600,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "first paint" in result.stdout
@@ -0,0 +1,32 @@
+import pytest
+
+QtGui = pytest.importorskip("PySide6.QtGui")
+
+from utils.text_patch import diff_range, replace_text, set_plain_text, utf16_length
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QtGui.QGuiApplication.instance() or QtGui.QGuiApplication([])
+
+def test_utf16_length():
+    assert utf16_length("abc") == 3
+    assert utf16_length("𝔸+é") == 4
+
+def test_diff_range():
+    assert diff_range("x+1=2", "x+10=2") == (3, 3, "0")
+
+def test_replace_after_non_bmp_character():
+    document = QtGui.QTextDocument("𝔸·x+1\nfoo")
+    assert replace_text(document, 0, "𝔸·x+1", "𝔸·x+2")
+    assert document.toPlainText() == "𝔸·x+2\nfoo"
+
+def test_replace_at_position_after_non_bmp_line():
+    document = QtGui.QTextDocument("😀\na+b")
+    # Second line starts at 3, the emoji is two code units
+    assert replace_text(document, 3, "a+b", "a-b")
+    assert document.toPlainText() == "😀\na-b"
+
+def test_set_plain_text():
+    document = QtGui.QTextDocument("𝔸 𝔹 c")
+    set_plain_text(document, "𝔸 𝔹 d")
+    assert document.toPlainText() == "𝔸 𝔹 d"